@@ -6,16 +6,25 @@ Demonstrates the complete pipeline: Voice → Transcription → RAG → LLM →
 """
 
 import argparse
+import hashlib
+import json
+import os
+import pickle
+import select
 import sys
 from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional
 
-from src.orchestrator import VocalTutorOrchestrator
-from src.utils import format_time, get_config, setup_logging
+from src.utils import format_time, get_config, load_wav_pcm16, setup_logging
 
+# The ML stack (torch, faster-whisper, llama-cpp, FAISS...) is imported in
+# main() after argument parsing, so that --help answers instantly
+if TYPE_CHECKING:
+    from src.orchestrator import VocalTutorOrchestrator
 
-def print_banner():
-    """Print welcome banner."""
-    banner = """
+
+# Display strings, built once
+BANNER = """
 ╔═══════════════════════════════════════════════════════════════╗
 ║                                                               ║
 ║        🎓  AGENT VOCAL IA - TUTEUR ÉDUCATIF LOCAL  🎓        ║
@@ -24,14 +33,26 @@ def print_banner():
 ║                                                               ║
 ╚═══════════════════════════════════════════════════════════════╝
 """
-    print(banner)
+SECTION_RULE = "=" * 70
+RULE = "-" * 70
+# Interactive mode commands ('matiere:<subject>' aside)
+QUIT_COMMANDS = ('quit', 'exit', 'q')
+INTERACTIVE_COMMANDS = QUIT_COMMANDS + ('history', 'clear', 'status')
+AUDIO_MODE_STEPS = "\n".join([
+    "   [1/3] Transcription de l'audio (ASR)...",
+    "   [2/3] Recherche de contexte (RAG)...",
+    "   [3/3] Réponse (LLM) et synthèse vocale (TTS) en parallèle...",
+])
+
+
+def print_banner():
+    """Print welcome banner."""
+    print(BANNER)
 
 
 def print_section(title: str):
     """Print section header."""
-    print("\n" + "=" * 70)
-    print(f"  {title}")
-    print("=" * 70)
+    print(f"\n{SECTION_RULE}\n  {title}\n{SECTION_RULE}")
 
 
 def print_result(label: str, value: str, indent: int = 2):
@@ -40,7 +61,65 @@ def print_result(label: str, value: str, indent: int = 2):
     print(f"{prefix}{label}: {value}")
 
 
-def demo_text_mode(orchestrator: VocalTutorOrchestrator, question: str, subject: str = None):
+def print_sources(sources: list):
+    """Print the sources list with a single write."""
+    lines = "\n".join(f"   • {src['filename']} (score: {src['score']:.3f})" for src in sources)
+    print(f"\n📚 Sources utilisées ({len(sources)}):\n{lines}")
+
+
+# Display headers for the hint levels returned by TutorLLM.parse_hints
+HINT_HEADERS = {
+    'niveau_1': "\n  Niveau 1:\n",
+    'niveau_2': "\n  Niveau 2:\n",
+    'niveau_3': "\n  Niveau 3:\n",
+}
+
+
+def format_hints(hints: dict) -> str:
+    """Format non-empty hints as one indented block."""
+    return "\n".join(
+        HINT_HEADERS.get(level, f"\n  {level.replace('_', ' ').title()}:\n") +
+        "\n".join(f"    {line}" for line in hint.split('\n') if line.strip())
+        for level, hint in hints.items() if hint
+    )
+
+
+class FastStreamer:
+    """Buffered stdout writer for streamed LLM tokens."""
+    
+    FLUSH_SIZE = 4096
+    
+    def __init__(self, indent: int = 2):
+        """
+        Initialize streamer.
+        
+        Args:
+            indent: Indentation kept at the start of each response line
+        """
+        self.newline = "\n" + " " * indent
+        self._buffer = []
+        self._size = 0
+    
+    def write(self, token: str) -> None:
+        """Buffer a token; flush at line or sentence end, or when the buffer is full."""
+        token = token.replace("\n", self.newline)
+        self._buffer.append(token)
+        self._size += len(token)
+        
+        if ("\n" in token or token.rstrip().endswith(('.', '!', '?')) or
+                self._size >= self.FLUSH_SIZE):
+            self.flush()
+    
+    def flush(self) -> None:
+        """Write buffered tokens to stdout."""
+        if self._buffer:
+            sys.stdout.write("".join(self._buffer))
+            self._buffer.clear()
+            self._size = 0
+        sys.stdout.flush()
+
+
+def demo_text_mode(orchestrator: "VocalTutorOrchestrator", question: str, subject: str = None) -> dict:
     """
     Run demo in text mode.
     
@@ -48,6 +127,9 @@ def demo_text_mode(orchestrator: VocalTutorOrchestrator, question: str, subject:
         orchestrator: Orchestrator instance
         question: Text question
         subject: Optional subject
+        
+    Returns:
+        Results from process_text_question
     """
     print_section("MODE TEXTE - Démonstration")
     
@@ -59,15 +141,42 @@ def demo_text_mode(orchestrator: VocalTutorOrchestrator, question: str, subject:
     else:
         print(f"\n🔍 Détection automatique de la matière...")
     
-    print("\n⏳ Traitement en cours...")
-    print("   [1/3] Recherche de contexte dans les documents...")
-    print("   [2/3] Génération de la réponse par le LLM...")
-    print("   [3/3] Synthèse vocale...")
+    print("\n⏳ Traitement en cours (la synthèse vocale démarre dès la première phrase)...")
+    
+    # Process, streaming the response while each sentence is synthesized
+    print(f"\n💡 Réponse du tuteur:")
+    print(RULE)
+    print("  ", end='')
+    streamer = FastStreamer()
+    audio_segments = []
+    results = orchestrator.process_text_question(
+        question,
+        subject=subject,
+        generate_audio=True,
+        on_token=streamer.write,
+        on_audio_chunk=audio_segments.append,
+        wait_for_audio=False
+    )
+    streamer.flush()
+    print()
+    print(RULE)
     
-    # Process
-    results = orchestrator.process_text_question(question, subject=subject, generate_audio=True)
+    # The last sentences are still being synthesized while the results print
+    print_text_results(results, audio_segments)
+    return results
+
+
+def print_text_results(results: dict, audio_segments: Optional[List[str]] = None):
+    """
+    Display text-mode results (everything but the streamed response).
     
-    # Display results
+    A pending 'audio_future' is awaited only once everything else is printed,
+    then replaced by 'audio_output' in the results.
+    
+    Args:
+        results: Results from process_text_question
+        audio_segments: Synthesized audio segment files, if known
+    """
     if results.get('success'):
         print_section("✅ RÉSULTATS")
         
@@ -77,35 +186,27 @@ def demo_text_mode(orchestrator: VocalTutorOrchestrator, question: str, subject:
         # Sources
         sources = results.get('sources', [])
         if sources:
-            print(f"\n📚 Sources utilisées ({len(sources)}):")
-            for src in sources:
-                print(f"   • {src['filename']} (score: {src['score']:.3f})")
+            print_sources(sources)
         else:
             print("\n📚 Aucune source trouvée (réponse sans RAG)")
         
-        # Response
-        print(f"\n💡 Réponse du tuteur:")
-        print("-" * 70)
-        response = results.get('response', '')
-        for line in response.split('\n'):
-            print(f"  {line}")
-        print("-" * 70)
-        
         # Hints
         hints = results.get('hints', {})
         if any(hints.values()):
-            print(f"\n🎓 Indices progressifs extraits:")
-            for level, hint in hints.items():
-                if hint:
-                    print(f"\n  {level.replace('_', ' ').title()}:")
-                    for line in hint.split('\n'):
-                        if line.strip():
-                            print(f"    {line}")
+            print(f"\n🎓 Indices progressifs extraits:\n{format_hints(hints)}")
         
         # Audio
+        audio_future = results.pop('audio_future', None)
+        if audio_future is not None:
+            try:
+                results['audio_output'] = audio_future.result()
+            except Exception as e:
+                print(f"\n❌ Synthèse vocale échouée: {e}")
+        
         audio_path = results.get('audio_output')
         if audio_path:
-            print(f"\n🔊 Audio généré: {audio_path}")
+            segments = len(audio_segments) if audio_segments is not None else 1
+            print(f"\n🔊 Audio généré: {audio_path} ({segments} segment(s))")
             print("   Vous pouvez le lire avec: aplay, vlc, ou tout autre lecteur")
         
         print_section("✅ DÉMONSTRATION TERMINÉE")
@@ -115,7 +216,128 @@ def demo_text_mode(orchestrator: VocalTutorOrchestrator, question: str, subject:
         print(f"\n{results.get('error', 'Erreur inconnue')}")
 
 
-def demo_audio_mode(orchestrator: VocalTutorOrchestrator, audio_path: str, subject: str = None):
+def file_stamp(path: str) -> str:
+    """Path and modification time of a file, or the bare path if it is missing."""
+    try:
+        return f"{path}:{os.stat(path).st_mtime_ns}"
+    except OSError:
+        return path
+
+
+def config_digest(config, sections: List[str]) -> str:
+    """
+    Hash of configuration sections.
+    
+    Args:
+        config: Configuration instance
+        sections: Top-level section names (e.g. 'llm', 'rag')
+        
+    Returns:
+        Hex digest, stable across key order
+    """
+    values = {section: config.get(section, {}) for section in sections}
+    return hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def pipeline_fingerprint(config, *extra: str) -> str:
+    """
+    Fingerprint of everything a cached answer depends on.
+    
+    Covers the llm/rag/tts settings, the system prompt, the LLM and TTS model
+    files and every RAG index and chunk file (path and modification time).
+    
+    Args:
+        config: Configuration instance
+        *extra: Further key parts (e.g. question and subject)
+        
+    Returns:
+        Hex digest
+    """
+    from src.prompts import TUTOR_SYSTEM_PROMPT
+    
+    index_dir = Path(config.get('rag.index_dir', 'data/indices'))
+    index_files = sorted(str(p) for pattern in ('*.index', '*_chunks.*') for p in index_dir.glob(pattern))
+    
+    key_parts = list(extra) + [config_digest(config, ['llm', 'rag', 'tts']), TUTOR_SYSTEM_PROMPT]
+    key_parts.extend(file_stamp(path) for path in [
+        config.get('llm.model_path', ''),
+        config.get('tts.model_path', '')
+    ] + index_files)
+    return hashlib.sha256("|".join(key_parts).encode('utf-8')).hexdigest()
+
+
+def demo_snapshot_path(config, question: str, subject: str) -> Path:
+    """
+    Path of the cached results of a fixed demo question.
+    
+    The key is the pipeline fingerprint of the question and subject.
+    
+    Args:
+        config: Configuration instance
+        question: Demo question
+        subject: Demo subject
+        
+    Returns:
+        Snapshot file path
+    """
+    key = pipeline_fingerprint(config, question, subject)[:16]
+    return Path(config.get('general.cache_dir', '.cache')) / 'demo' / f"{key}.pkl"
+
+
+def save_demo_snapshot(snapshot_path: Path, results: dict):
+    """Store demo results and their audio for later replay."""
+    audio = None
+    audio_path = results.get('audio_output')
+    if audio_path:
+        try:
+            with open(audio_path, 'rb') as f:
+                audio = f.read()
+        except OSError:
+            pass
+    
+    snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(snapshot_path, 'wb') as f:
+        pickle.dump({'results': results, 'audio': audio}, f)
+
+
+def replay_demo_snapshot(snapshot_path: Path, question: str) -> bool:
+    """
+    Replay cached demo results without loading any model.
+    
+    Args:
+        snapshot_path: Snapshot file path
+        question: Demo question
+        
+    Returns:
+        True if a snapshot was replayed
+    """
+    try:
+        with open(snapshot_path, 'rb') as f:
+            snapshot = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return False
+    
+    results = snapshot['results']
+    
+    # Restore the audio file if it was cleaned up since
+    audio_path = results.get('audio_output')
+    if audio_path and snapshot['audio'] and not os.path.exists(audio_path):
+        os.makedirs(os.path.dirname(audio_path) or '.', exist_ok=True)
+        with open(audio_path, 'wb') as f:
+            f.write(snapshot['audio'])
+    
+    print_section("MODE TEXTE - Démonstration (résultat en cache)")
+    print(f"\n📝 Question:")
+    print(f"   {question}")
+    
+    response = "\n".join(f"  {line}" for line in results.get('response', '').split('\n'))
+    print(f"\n💡 Réponse du tuteur:\n{RULE}\n{response}\n{RULE}")
+    
+    print_text_results(results)
+    return True
+
+
+def demo_audio_mode(orchestrator: "VocalTutorOrchestrator", audio_path: str, subject: str = None):
     """
     Run demo in audio mode.
     
@@ -134,13 +356,42 @@ def demo_audio_mode(orchestrator: VocalTutorOrchestrator, audio_path: str, subje
         print(f"🔍 Détection automatique de la matière...")
     
     print("\n⏳ Traitement en cours...")
-    print("   [1/4] Transcription de l'audio (ASR)...")
-    print("   [2/4] Recherche de contexte (RAG)...")
-    print("   [3/4] Génération de la réponse (LLM)...")
-    print("   [4/4] Synthèse vocale (TTS)...")
+    print(AUDIO_MODE_STEPS)
+    print()
+    
+    streamer = FastStreamer()
+    response_started = []
     
-    # Process
-    results = orchestrator.process_audio_file(audio_path, subject=subject)
+    def on_partial_transcript(index: int, text: str):
+        print(f"   [ASR chunk {index}] {text}")
+    
+    def on_token(token: str):
+        # Open the response block on the first token
+        if not response_started:
+            response_started.append(True)
+            print(f"\n💡 Réponse du tuteur:")
+            print(RULE)
+            print("  ", end='')
+        streamer.write(token)
+    
+    # Process, streaming the response while each sentence is synthesized.
+    # PCM16 WAV files are decoded in memory; other formats are streamed from disk.
+    pcm = load_wav_pcm16(audio_path)
+    if pcm is not None:
+        audio, sample_rate = pcm
+        results = orchestrator.process_audio_array(audio, sample_rate, subject=subject, on_token=on_token)
+        results['audio_path'] = audio_path
+    else:
+        results = orchestrator.process_audio_file(
+            audio_path,
+            subject=subject,
+            on_token=on_token,
+            on_partial_transcript=on_partial_transcript
+        )
+    if response_started:
+        streamer.flush()
+        print()
+        print(RULE)
     
     # Display results
     if results.get('success'):
@@ -158,17 +409,7 @@ def demo_audio_mode(orchestrator: VocalTutorOrchestrator, audio_path: str, subje
         # Sources
         sources = results.get('sources', [])
         if sources:
-            print(f"\n📚 Sources utilisées ({len(sources)}):")
-            for src in sources:
-                print(f"   • {src['filename']} (score: {src['score']:.3f})")
-        
-        # Response
-        print(f"\n💡 Réponse du tuteur:")
-        print("-" * 70)
-        response = results.get('response', '')
-        for line in response.split('\n'):
-            print(f"  {line}")
-        print("-" * 70)
+            print_sources(sources)
         
         # Audio output
         audio_output = results.get('audio_output')
@@ -182,7 +423,127 @@ def demo_audio_mode(orchestrator: VocalTutorOrchestrator, audio_path: str, subje
         print(f"\n{results.get('error', 'Erreur inconnue')}")
 
 
-def demo_interactive(orchestrator: VocalTutorOrchestrator):
+def read_pending_lines() -> list:
+    """Read the lines already waiting on stdin (e.g. the rest of a pasted block)."""
+    lines = []
+    try:
+        while select.select([sys.stdin], [], [], 0)[0]:
+            line = sys.stdin.readline()
+            if not line:
+                break
+            if line.strip():
+                lines.append(line.strip())
+    except (OSError, ValueError):
+        # stdin does not support select (e.g. Windows console)
+        pass
+    return lines
+
+
+def is_command(line: str) -> bool:
+    """Whether an input line is an interactive mode command rather than a question."""
+    line = line.lower()
+    return line in INTERACTIVE_COMMANDS or line.startswith('matiere:')
+
+
+def answer_batch(orchestrator: "VocalTutorOrchestrator", questions: List[str], cache=None):
+    """
+    Answer a pasted block of questions, reusing cached answers.
+    
+    Args:
+        orchestrator: Orchestrator instance
+        questions: Questions, in the order they were asked
+        cache: Optional SemanticCache
+    """
+    subjects = orchestrator.resolve_subjects(questions)
+    
+    embeddings = [None] * len(questions)
+    missing = list(range(len(questions)))
+    if cache is not None:
+        embeddings = orchestrator.rag.generate_query_embeddings(questions)
+        missing = []
+        for i, (question, subject) in enumerate(zip(questions, subjects)):
+            cached = cache.lookup(embeddings[i], subject)
+            if cached is None:
+                missing.append(i)
+                continue
+            orchestrator.add_to_history(question, cached.get('response', ''), subject)
+            print_batch_answer(question, {**cached, 'cached': True})
+    
+    def on_result(j: int, results: dict):
+        i = missing[j]
+        if cache is not None and results.get('success'):
+            cache.add(embeddings[i], results, subjects[i])
+        print_batch_answer(questions[i], results)
+    
+    if missing:
+        orchestrator.process_text_questions(
+            [questions[i] for i in missing],
+            generate_audio=False,
+            on_result=on_result,
+            subjects=[subjects[i] for i in missing]
+        )
+    
+    # Answers finish in any order: stay on the last question's subject
+    orchestrator.current_subject = subjects[-1]
+
+
+def print_batch_answer(question: str, results: dict):
+    """Print one answer of a batch of questions."""
+    print(f"\n❓ {question}")
+    if results.get('cached'):
+        print("⚡ Réponse trouvée dans le cache (question similaire)")
+    if results.get('success'):
+        print(f"📚 Matière: {results.get('subject')}")
+        response = "\n".join(f"  {line}" for line in results.get('response', '').split('\n'))
+        print(f"{RULE}\n{response}\n{RULE}")
+    else:
+        print(f"❌ Erreur: {results.get('error')}")
+
+
+def answer_question(orchestrator: "VocalTutorOrchestrator", question: str, cache=None):
+    """
+    Answer one question, streaming the response as it is generated.
+    
+    Args:
+        orchestrator: Orchestrator instance
+        question: Question text
+        cache: Optional SemanticCache
+    """
+    print("\n⏳ Traitement...")
+    print(f"\n💡 Réponse:")
+    print(RULE)
+    print("  ", end='')
+    streamer = FastStreamer()
+    subject = orchestrator.resolve_subject(question)
+    
+    def compute():
+        return orchestrator.process_text_question(
+            question, subject=subject, generate_audio=False, on_token=streamer.write
+        )
+    
+    results = cache.get_or_compute(question, compute, subject) if cache is not None else compute()
+    if results.get('cached'):
+        streamer.write(results.get('response', ''))
+    streamer.flush()
+    print()
+    print(RULE)
+    
+    if results.get('cached'):
+        orchestrator.current_subject = subject
+        orchestrator.add_to_history(question, results.get('response', ''), subject)
+        print("\n⚡ Réponse trouvée dans le cache (question similaire)")
+    
+    if results.get('success'):
+        print(f"\n📚 Matière: {results.get('subject')}")
+        
+        sources = results.get('sources', [])
+        if sources:
+            print(f"\n📚 Sources: {', '.join(s['filename'] for s in sources)}")
+    else:
+        print(f"\n❌ Erreur: {results.get('error')}")
+
+
+def demo_interactive(orchestrator: "VocalTutorOrchestrator"):
     """
     Run interactive demo mode.
     
@@ -197,21 +558,55 @@ def demo_interactive(orchestrator: VocalTutorOrchestrator):
     print("   - 'history' : afficher l'historique")
     print("   - 'clear' : effacer l'historique")
     print("   - 'status' : afficher le statut")
+    print("   Collez plusieurs lignes pour poser plusieurs questions d'un coup.")
+    
+    from src.semantic_cache import SemanticCache
+    
+    # Semantic cache for repeated / near-duplicate questions
+    config = orchestrator.config
+    cache = None
+    cache_path = config.get('orchestrator.semantic_cache_path', '.cache/semantic_cache.pkl')
+    if config.get('orchestrator.semantic_cache_enabled', True):
+        cache = SemanticCache(
+            orchestrator.rag.generate_query_embedding,
+            threshold=config.get('orchestrator.semantic_cache_threshold', 0.95),
+            seed=config.get('general.seed', 42),
+            fingerprint=pipeline_fingerprint(config)
+        )
+        cache.load(cache_path)
+    
+    # Lines still to handle: a pasted block can mix commands and questions
+    pending = []
     
     while True:
-        print("\n" + "-" * 70)
-        question = input("❓ Votre question: ").strip()
+        if not pending:
+            print("\n" + RULE)
+            line = input("❓ Votre question: ").strip()
+            if not line:
+                continue
+            pending = [line] + read_pending_lines()
         
-        if not question:
+        if not is_command(pending[0]):
+            # Questions up to the next command are answered as one batch
+            end = next((i for i, line in enumerate(pending) if is_command(line)), len(pending))
+            questions, pending = pending[:end], pending[end:]
+            if len(questions) > 1:
+                print(f"\n⏳ Traitement de {len(questions)} questions...")
+                answer_batch(orchestrator, questions, cache)
+            else:
+                answer_question(orchestrator, questions[0], cache)
             continue
         
-        if question.lower() in ['quit', 'exit', 'q']:
+        command = pending.pop(0)
+        if command.lower() in QUIT_COMMANDS:
+            if cache is not None:
+                cache.save(cache_path)
             print("\n👋 Au revoir!")
             break
         
         # Handle special commands
-        if question.lower().startswith('matiere:'):
-            subject = question.split(':')[1].strip()
+        if command.lower().startswith('matiere:'):
+            subject = command.split(':')[1].strip()
             try:
                 orchestrator.set_subject(subject)
                 print(f"✅ Matière changée: {subject}")
@@ -219,7 +614,7 @@ def demo_interactive(orchestrator: VocalTutorOrchestrator):
                 print(f"❌ {e}")
             continue
         
-        if question.lower() == 'history':
+        if command.lower() == 'history':
             history = orchestrator.get_conversation_history()
             if history:
                 print(f"\n📜 Historique ({len(history)} interactions):")
@@ -231,12 +626,15 @@ def demo_interactive(orchestrator: VocalTutorOrchestrator):
                 print("\n📜 Historique vide")
             continue
         
-        if question.lower() == 'clear':
+        if command.lower() == 'clear':
             orchestrator.clear_history()
+            if cache is not None:
+                cache.clear()
+                cache.save(cache_path)
             print("✅ Historique effacé")
             continue
         
-        if question.lower() == 'status':
+        if command.lower() == 'status':
             status = orchestrator.get_status()
             print(f"\n📊 Statut:")
             print(f"   Matière actuelle: {status['current_subject']}")
@@ -244,24 +642,6 @@ def demo_interactive(orchestrator: VocalTutorOrchestrator):
             print(f"   Historique: {status['conversation_length']} interactions")
             print(f"   Modules chargés: {sum(status['modules_loaded'].values())}/4")
             continue
-        
-        # Process question
-        print("\n⏳ Traitement...")
-        results = orchestrator.process_text_question(question, generate_audio=False)
-        
-        if results.get('success'):
-            print(f"\n📚 Matière: {results.get('subject')}")
-            print(f"\n💡 Réponse:")
-            print("-" * 70)
-            for line in results.get('response', '').split('\n'):
-                print(f"  {line}")
-            print("-" * 70)
-            
-            sources = results.get('sources', [])
-            if sources:
-                print(f"\n📚 Sources: {', '.join(s['filename'] for s in sources)}")
-        else:
-            print(f"\n❌ Erreur: {results.get('error')}")
 
 
 def main():
@@ -291,12 +671,24 @@ Exemples d'utilisation:
                        help="Mode interactif")
     parser.add_argument('--config', type=str, default='config.yaml',
                        help="Fichier de configuration")
+    parser.add_argument('--no-warmup', action='store_true',
+                       help="Ne pas précharger les modèles au démarrage (chargement à la demande)")
+    parser.add_argument('--no-kv-cache', action='store_true',
+                       help="Désactiver le cache KV des documents (comparaison A/B)")
     parser.add_argument('--log-level', type=str, default='INFO',
                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
                        help="Niveau de log")
     
     args = parser.parse_args()
     
+    # Fail fast on a missing audio file, before any model is loaded
+    if args.audio:
+        try:
+            os.stat(args.audio)
+        except OSError:
+            print(f"\n❌ Erreur: Fichier audio non trouvé: {args.audio}")
+            sys.exit(1)
+    
     # Setup
     setup_logging(level=args.log_level)
     
@@ -305,12 +697,31 @@ Exemples d'utilisation:
     # Load config
     print("🔧 Chargement de la configuration...")
     config = get_config(args.config)
+    if args.no_kv_cache:
+        config.set('llm.kv_cache_enabled', False)
+    
+    # Default demo: replay the cached run when nothing it depends on changed
+    demo_question = "Quelle est la formule pour résoudre une équation du second degré ?"
+    snapshot_path = None
+    if not (args.interactive or args.audio or args.text):
+        snapshot_path = demo_snapshot_path(config, demo_question, 'maths')
+        print("\n💡 Aucun mode spécifié, démonstration simple:")
+        if replay_demo_snapshot(snapshot_path, demo_question):
+            print("\n💡 Pour plus d'options, utilisez: python demo_cli.py --help")
+            return
     
     # Initialize orchestrator
     print("🚀 Initialisation de l'orchestrateur...")
-    print("   (Les modèles seront chargés à la demande)")
+    from src.orchestrator import VocalTutorOrchestrator
     orchestrator = VocalTutorOrchestrator(config)
     
+    if args.no_warmup:
+        print("   (Les modèles seront chargés à la demande)")
+    else:
+        print("🔥 Préchargement des modèles...")
+        warmed = orchestrator.warmup()
+        print(f"   Modules prêts: {sum(warmed.values())}/{len(warmed)}")
+    
     # Check available subjects
     available = orchestrator.get_available_subjects()
     if available:
@@ -323,17 +734,14 @@ Exemples d'utilisation:
     if args.interactive:
         demo_interactive(orchestrator)
     elif args.audio:
-        if not Path(args.audio).exists():
-            print(f"\n❌ Erreur: Fichier audio non trouvé: {args.audio}")
-            sys.exit(1)
         demo_audio_mode(orchestrator, args.audio, args.subject)
     elif args.text:
         demo_text_mode(orchestrator, args.text, args.subject)
     else:
-        # Default: show help and run simple demo
-        print("\n💡 Aucun mode spécifié, démonstration simple:")
-        demo_question = "Quelle est la formule pour résoudre une équation du second degré ?"
-        demo_text_mode(orchestrator, demo_question, subject='maths')
+        # Default: run simple demo and keep its results for the next run
+        results = demo_text_mode(orchestrator, demo_question, subject='maths')
+        if results.get('success'):
+            save_demo_snapshot(snapshot_path, results)
         print("\n💡 Pour plus d'options, utilisez: python demo_cli.py --help")
 
 
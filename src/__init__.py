@@ -5,8 +5,12 @@ Modules principaux:
     - asr: Reconnaissance vocale (Faster-Whisper + Silero VAD)
     - rag: Système RAG (FAISS + SentenceTransformers)
     - llm: Génération de texte (llama-cpp-python)
+    - llm_server: Client d'un serveur llama.cpp partagé (batching continu)
+    - prompts: Textes des prompts du tuteur
     - tts: Synthèse vocale (Piper-TTS)
     - orchestrator: Orchestration du pipeline complet
+    - onnx_encoder: Encodeur d'embeddings int8 sur ONNX Runtime
+    - semantic_cache: Cache des réponses aux questions similaires
     - utils: Utilitaires et helpers
 """
 
@@ -6,17 +6,172 @@ for voice activity detection.
 """
 
 import argparse
+import io
 import logging
+import math
+import os
+import queue
+import threading
 import time
+from functools import lru_cache
 from pathlib import Path
-from typing import Generator, Optional, Union
+from typing import TYPE_CHECKING, Callable, Dict, Generator, Optional, Tuple
 
 import numpy as np
 import soundfile as sf
-import torch
-from faster_whisper import WhisperModel
 
-from .utils import Config, get_config, get_device, setup_logging
+from .utils import Config, get_config, setup_logging
+
+# torch and faster_whisper take seconds to import: load them with the models
+if TYPE_CHECKING:
+    import torch
+    from faster_whisper import WhisperModel
+
+# Formats decoded by libsndfile; anything else (mp3, m4a, opus...) goes through PyAV
+SOUNDFILE_EXTENSIONS = {'.wav', '.flac', '.ogg', '.aiff', '.aif'}
+
+# Whisper models shared by all ASR instances, keyed on their load settings
+_MODEL_CACHE: Dict[Tuple, "WhisperModel"] = {}
+_MODEL_CACHE_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=8)
+def _resample_filter(up: int, down: int) -> np.ndarray:
+    """Anti-aliasing FIR kernel used by resample_poly for an up/down ratio."""
+    from scipy import signal
+    max_rate = max(up, down)
+    return signal.firwin(20 * max_rate + 1, 1.0 / max_rate, window=('kaiser', 5.0))
+
+
+def downmix_to_mono(audio: np.ndarray) -> np.ndarray:
+    """
+    Average the channels of float32 audio without going through float64.
+    
+    Args:
+        audio: Audio array, mono or (samples, channels)
+        
+    Returns:
+        Mono float32 audio
+    """
+    if audio.ndim == 1:
+        return audio
+    if audio.shape[1] == 1:
+        return audio[:, 0]
+    if audio.shape[1] == 2:
+        mono = np.empty(audio.shape[0], dtype=np.float32)
+        np.add(audio[:, 0], audio[:, 1], out=mono)
+        mono *= 0.5
+        return mono
+    return audio.mean(axis=1, dtype=np.float32)
+
+
+def read_audio_mono(audio_path: str, blocksize: int = 480000) -> Tuple[np.ndarray, int]:
+    """
+    Decode an audio file block by block into a mono float32 array.
+    
+    Only one block of interleaved samples is held at a time, instead of the
+    whole multi-channel file.
+    
+    Args:
+        audio_path: Path to audio file
+        blocksize: Frames decoded per block
+        
+    Returns:
+        Tuple of (mono float32 audio, sample rate)
+    """
+    info = sf.info(audio_path)
+    audio = np.empty(info.frames, dtype=np.float32)
+    
+    offset = 0
+    for block in sf.blocks(audio_path, blocksize=blocksize, dtype='float32', always_2d=True):
+        mono = downmix_to_mono(block)
+        end = offset + len(mono)
+        if end > len(audio):
+            # Frame counts in headers can be approximate for compressed formats
+            audio = np.concatenate([audio[:offset], np.empty(end - offset + blocksize, dtype=np.float32)])
+        audio[offset:end] = mono
+        offset = end
+    
+    return audio[:offset], info.samplerate
+
+
+def load_silero_vad(use_onnx: bool = True) -> Tuple[object, tuple]:
+    """
+    Load the Silero VAD model and its utilities through torch.hub.
+    
+    The ONNX export runs on single-threaded ONNX Runtime CPU sessions, faster
+    than the TorchScript model for these small per-window inferences; the
+    TorchScript model is used when onnxruntime is not installed.
+    
+    Args:
+        use_onnx: Prefer the ONNX model
+        
+    Returns:
+        Tuple of (model, utilities tuple)
+    """
+    import torch
+    
+    logger = logging.getLogger(__name__)
+    if use_onnx:
+        try:
+            import onnxruntime  # noqa: F401
+        except ImportError:
+            logger.info("onnxruntime not installed, using TorchScript VAD")
+            use_onnx = False
+    
+    logger.info(f"Loading Silero VAD model ({'ONNX' if use_onnx else 'TorchScript'})...")
+    model, utils = torch.hub.load(
+        repo_or_dir='snakers4/silero-vad',
+        model='silero_vad',
+        force_reload=False,
+        onnx=use_onnx
+    )
+    if not use_onnx:
+        model.eval()
+    
+    return model, utils
+
+
+def frame_rms(audio: np.ndarray, frame_len: int) -> np.ndarray:
+    """
+    Compute the RMS level of consecutive frames.
+    
+    Args:
+        audio: Mono float32 audio
+        frame_len: Frame length in samples
+        
+    Returns:
+        RMS of each frame (a single value for audio shorter than one frame)
+    """
+    n_frames = len(audio) // frame_len
+    if n_frames == 0:
+        frames = audio.reshape(1, -1)
+        frame_len = max(len(audio), 1)
+    else:
+        frames = audio[:n_frames * frame_len].reshape(n_frames, frame_len)
+    return np.sqrt(np.einsum('ij,ij->i', frames, frames) / frame_len)
+
+
+def resample_audio(audio: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+    """
+    Resample audio with a polyphase filter.
+    
+    Args:
+        audio: Mono audio array
+        orig_sr: Sample rate of audio
+        target_sr: Target sample rate
+        
+    Returns:
+        Resampled float32 audio
+    """
+    if orig_sr == target_sr:
+        return audio
+    
+    from scipy import signal
+    g = math.gcd(orig_sr, target_sr)
+    up, down = target_sr // g, orig_sr // g
+    resampled = signal.resample_poly(audio, up, down, window=_resample_filter(up, down))
+    return resampled.astype(np.float32, copy=False)
 
 
 class ASR:
@@ -36,9 +191,34 @@ class ASR:
         self.model_name = config.get('asr.model_name', 'small')
         self.language = config.get('asr.language', 'fr')
         self.device = config.get('asr.device', 'cuda')
-        self.compute_type = config.get('asr.compute_type', 'float16')
+        self.compute_type = config.get('asr.compute_type', 'auto')
         self.vad_enabled = config.get('asr.vad_enabled', True)
+        self.vad_threshold = float(config.get('asr.vad_threshold', 0.5))
+        self.min_silence_duration_ms = int(config.get('asr.min_silence_duration_ms', 300))
+        self.speech_pad_ms = int(config.get('asr.speech_pad_ms', 30))
+        # Decoding: beam search for whole files, greedy for live/streamed audio
+        self.beam_size = config.get('asr.beam_size', 5)
+        self.realtime_beam_size = config.get('asr.realtime_beam_size', 1)
+        self.condition_on_previous_text = config.get('asr.condition_on_previous_text', False)
+        
+        # distil-whisper checkpoints (e.g. "distil-large-v3") have a 2-layer decoder,
+        # several times faster for a small WER cost, and expect 15 s windows
+        # without previous-text prompts
+        self.is_distil = 'distil' in self.model_name
+        self.chunk_length = 15 if self.is_distil else None
+        if self.is_distil:
+            self.condition_on_previous_text = False
+        silence_dbfs = config.get('asr.silence_threshold_dbfs', -50)
+        self.silence_rms = 10 ** (silence_dbfs / 20) if silence_dbfs is not None else None
+        self._whisper_vad_parameters = {
+            'threshold': self.vad_threshold,
+            'min_silence_duration_ms': self.min_silence_duration_ms,
+        }
         self.sample_rate = config.get('asr.sample_rate', 16000)
+        self.cpu_threads = config.get('asr.cpu_threads') or min(8, os.cpu_count() or 4)
+        self.num_workers = config.get('asr.num_workers', 1)
+        
+        import torch
         
         # Fallback to CPU if CUDA not available
         if self.device == 'cuda' and not torch.cuda.is_available():
@@ -46,38 +226,82 @@ class ASR:
             self.device = 'cpu'
             self.compute_type = 'int8'
         
-        # Initialize Whisper model
-        self.logger.info(f"Loading Whisper model: {self.model_name}")
-        self.logger.info(f"Device: {self.device}, Compute type: {self.compute_type}")
+        if self.compute_type == 'auto':
+            self.compute_type = self._default_compute_type()
         
-        try:
-            self.model = WhisperModel(
-                self.model_name,
-                device=self.device,
-                compute_type=self.compute_type,
-                download_root="models/whisper"
-            )
-            self.logger.info("✅ Whisper model loaded successfully")
-        except Exception as e:
-            self.logger.error(f"Error loading Whisper model: {e}")
-            raise
+        # Initialize Whisper model
+        self.model = self._load_model()
         
         # Initialize VAD if enabled
         self.vad_model = None
+        self._vad_buffer: Optional["torch.Tensor"] = None
         if self.vad_enabled:
             self._init_vad()
     
+    def _load_model(self) -> "WhisperModel":
+        """
+        Load the Whisper model, reusing one already loaded with the same settings.
+        
+        Returns:
+            WhisperModel instance
+        """
+        from faster_whisper import WhisperModel
+        
+        download_root = "models/whisper"
+        key = (self.model_name, self.device, self.compute_type, download_root,
+               self.cpu_threads, self.num_workers)
+        
+        with _MODEL_CACHE_LOCK:
+            model = _MODEL_CACHE.get(key)
+            if model is not None:
+                self.logger.info(f"Reusing loaded Whisper model: {self.model_name}")
+                return model
+            
+            self.logger.info(f"Loading Whisper model: {self.model_name}")
+            self.logger.info(f"Device: {self.device}, Compute type: {self.compute_type}")
+            
+            try:
+                model = WhisperModel(
+                    self.model_name,
+                    device=self.device,
+                    compute_type=self.compute_type,
+                    cpu_threads=self.cpu_threads,
+                    num_workers=self.num_workers,
+                    download_root=download_root
+                )
+                self.logger.info("✅ Whisper model loaded successfully")
+            except Exception as e:
+                self.logger.error(f"Error loading Whisper model: {e}")
+                raise
+            
+            _MODEL_CACHE[key] = model
+            return model
+    
+    def _default_compute_type(self) -> str:
+        """
+        Pick the fastest compute type for the device.
+        
+        int8 weights halve the bytes read per decoder step; on GPU the
+        activations stay in float16 when the card supports it (compute
+        capability 7.0+).
+        
+        Returns:
+            CTranslate2 compute type
+        """
+        import torch
+        
+        if self.device == 'cuda' and torch.cuda.get_device_capability() >= (7, 0):
+            return 'int8_float16'
+        return 'int8'
+    
     def _init_vad(self) -> None:
-        """Initialize Silero VAD model."""
+        """
+        Initialize Silero VAD model.
+        
+        See load_silero_vad for the ONNX / TorchScript choice.
+        """
         try:
-            self.logger.info("Loading Silero VAD model...")
-            self.vad_model, vad_utils = torch.hub.load(
-                repo_or_dir='snakers4/silero-vad',
-                model='silero_vad',
-                force_reload=False,
-                onnx=False
-            )
-            self.vad_model.eval()
+            self.vad_model, vad_utils = load_silero_vad(self.config.get('asr.vad_onnx', True))
             
             # Get VAD utilities
             (self.get_speech_timestamps,
@@ -103,21 +327,21 @@ class ASR:
         Returns:
             True if speech detected
         """
+        if self.is_silent(audio, sample_rate):
+            return False
+        
         if not self.vad_enabled or self.vad_model is None:
             return True  # Assume speech if VAD not available
         
         try:
-            # Convert to tensor
-            audio_tensor = torch.from_numpy(audio).float()
-            
             # Get speech timestamps
             speech_timestamps = self.get_speech_timestamps(
-                audio_tensor,
+                self._to_vad_tensor(audio),
                 self.vad_model,
                 sampling_rate=sample_rate,
-                threshold=self.config.get('asr.vad_threshold', 0.5),
-                min_silence_duration_ms=self.config.get('asr.min_silence_duration_ms', 300),
-                speech_pad_ms=self.config.get('asr.speech_pad_ms', 30)
+                threshold=self.vad_threshold,
+                min_silence_duration_ms=self.min_silence_duration_ms,
+                speech_pad_ms=self.speech_pad_ms
             )
             
             return len(speech_timestamps) > 0
@@ -125,6 +349,70 @@ class ASR:
             self.logger.error(f"Error in VAD: {e}")
             return True  # Assume speech on error
     
+    def is_silent(self, audio: np.ndarray, sample_rate: int = 16000) -> bool:
+        """
+        Cheap silence check run before the VAD and Whisper models.
+        
+        Args:
+            audio: Mono audio array
+            sample_rate: Sample rate of audio
+            
+        Returns:
+            True if no 30 ms frame is louder than asr.silence_threshold_dbfs
+        """
+        if self.silence_rms is None or audio.size == 0:
+            return audio.size == 0
+        
+        frame_len = max(int(sample_rate * 0.03), 1)
+        return float(frame_rms(audio, frame_len).max()) < self.silence_rms
+    
+    def _to_vad_tensor(self, audio: np.ndarray) -> "torch.Tensor":
+        """
+        Copy audio into the reusable VAD input tensor.
+        
+        The buffer grows to the longest clip seen (at least 30 s), so repeated
+        calls do not allocate a new tensor each time.
+        
+        Args:
+            audio: Audio array
+            
+        Returns:
+            Float32 tensor view holding the audio
+        """
+        import torch
+        
+        if self._vad_buffer is None or self._vad_buffer.numel() < audio.size:
+            self._vad_buffer = torch.empty(max(audio.size, self.sample_rate * 30), dtype=torch.float32)
+        
+        audio_tensor = self._vad_buffer[:audio.size]
+        audio_tensor.copy_(torch.from_numpy(np.ascontiguousarray(audio)))
+        return audio_tensor
+    
+    def load_audio(self, audio_path: str) -> np.ndarray:
+        """
+        Load an audio file as mono float32 at the model sample rate.
+        
+        WAV/FLAC/OGG are decoded with soundfile; other formats use
+        faster-whisper's PyAV decoder, which downmixes and resamples itself.
+        
+        Args:
+            audio_path: Path to audio file
+            
+        Returns:
+            Mono float32 audio
+        """
+        if Path(audio_path).suffix.lower() not in SOUNDFILE_EXTENSIONS:
+            from faster_whisper.audio import decode_audio
+            return decode_audio(audio_path, sampling_rate=self.sample_rate)
+        
+        audio, sr = read_audio_mono(audio_path)
+        
+        # Resample if needed (Whisper expects 16kHz)
+        if sr != self.sample_rate:
+            self.logger.info(f"Resampling from {sr}Hz to {self.sample_rate}Hz")
+            audio = resample_audio(audio, sr, self.sample_rate)
+        return audio
+    
     def transcribe_file(
         self,
         audio_path: str,
@@ -147,42 +435,31 @@ class ASR:
         
         # Read audio file
         try:
-            audio, sr = sf.read(audio_path)
-            
-            # Convert stereo to mono if needed
-            if len(audio.shape) > 1:
-                audio = audio.mean(axis=1)
-            
-            # Resample if needed (Whisper expects 16kHz)
-            if sr != self.sample_rate:
-                self.logger.info(f"Resampling from {sr}Hz to {self.sample_rate}Hz")
-                from scipy import signal
-                num_samples = int(len(audio) * self.sample_rate / sr)
-                audio = signal.resample(audio, num_samples)
+            audio = self.load_audio(audio_path)
         except Exception as e:
             self.logger.error(f"Error reading audio file: {e}")
             raise
         
-        # Check for speech using VAD
-        if self.vad_enabled and not self.detect_speech(audio, self.sample_rate):
+        if self.is_silent(audio, self.sample_rate):
             self.logger.warning("No speech detected in audio")
             return ""
         
-        # Transcribe
+        # Transcribe (vad_filter drops non-speech, no separate VAD pass needed)
         lang = language or self.language
         segments, info = self.model.transcribe(
-            audio,
+            self._prepare_audio(audio),
             language=lang,
             task=task,
+            beam_size=self.beam_size,
+            condition_on_previous_text=not self.is_distil,
+            chunk_length=self.chunk_length,
+            without_timestamps=True,
             vad_filter=self.vad_enabled,
-            vad_parameters={
-                'threshold': self.config.get('asr.vad_threshold', 0.5),
-                'min_silence_duration_ms': self.config.get('asr.min_silence_duration_ms', 300),
-            } if self.vad_enabled else None
+            vad_parameters=self._whisper_vad_parameters if self.vad_enabled else None
         )
         
         # Combine segments
-        text = " ".join([segment.text for segment in segments]).strip()
+        text = self._join_segments(segments)
         
         elapsed = time.time() - start_time
         self.logger.info(f"Transcription completed in {elapsed:.2f}s")
@@ -190,6 +467,131 @@ class ASR:
         
         return text
     
+    def transcribe_file_chunked(
+        self,
+        audio_path: str,
+        on_partial: Optional[Callable[[int, str], None]] = None,
+        language: Optional[str] = None,
+        chunk_duration: float = 10.0
+    ) -> str:
+        """
+        Transcribe audio file chunk by chunk while it is still being read.
+        
+        A reader thread decodes the file in 1 s blocks; transcription of a
+        chunk starts as soon as enough audio is buffered, cut at the end of
+        the last complete speech segment when VAD is available.
+        
+        Args:
+            audio_path: Path to audio file
+            on_partial: Optional callback receiving (chunk index, chunk text)
+            language: Optional language override
+            chunk_duration: Audio duration (seconds) buffered before transcribing
+            
+        Returns:
+            Transcribed text
+        """
+        self.logger.info(f"Chunked transcription: {audio_path}")
+        start_time = time.time()
+        
+        if Path(audio_path).suffix.lower() in SOUNDFILE_EXTENSIONS:
+            sr = sf.info(audio_path).samplerate
+            
+            def iter_blocks():
+                for block in sf.blocks(audio_path, blocksize=sr, dtype='float32', always_2d=True):
+                    yield downmix_to_mono(block)
+        else:
+            # PyAV decodes the whole file at once
+            sr = self.sample_rate
+            
+            def iter_blocks():
+                audio = self.load_audio(audio_path)
+                for start in range(0, len(audio), sr):
+                    yield audio[start:start + sr]
+        
+        blocks: queue.Queue = queue.Queue()
+        
+        def read_blocks():
+            try:
+                for block in iter_blocks():
+                    blocks.put(block)
+                blocks.put(None)
+            except Exception as e:
+                blocks.put(e)
+        
+        reader = threading.Thread(target=read_blocks, daemon=True)
+        reader.start()
+        
+        texts = []
+        buffer = np.zeros(0, dtype=np.float32)
+        chunk_samples = int(chunk_duration * sr)
+        
+        def flush(audio: np.ndarray) -> None:
+            text = self.transcribe_array(audio, sample_rate=sr, language=language)
+            if text:
+                texts.append(text)
+                if on_partial:
+                    on_partial(len(texts), text)
+        
+        while True:
+            block = blocks.get()
+            if isinstance(block, Exception):
+                self.logger.error(f"Error reading audio file: {block}")
+                raise block
+            if block is None:
+                break
+            
+            buffer = np.concatenate([buffer, block])
+            if len(buffer) >= chunk_samples:
+                split = self._find_split_point(buffer, sr)
+                flush(buffer[:split])
+                buffer = buffer[split:]
+        
+        if len(buffer):
+            flush(buffer)
+        
+        elapsed = time.time() - start_time
+        self.logger.info(f"Chunked transcription completed in {elapsed:.2f}s ({len(texts)} chunks)")
+        
+        return " ".join(texts).strip()
+    
+    def _find_split_point(self, audio: np.ndarray, sample_rate: int) -> int:
+        """
+        Find where to cut buffered audio without splitting a word.
+        
+        Args:
+            audio: Buffered audio
+            sample_rate: Sample rate of audio
+            
+        Returns:
+            Sample index to cut at (end of the last complete speech segment,
+            or the whole buffer if none is found)
+        """
+        if not self.vad_enabled or self.vad_model is None:
+            return len(audio)
+        
+        try:
+            # Silero VAD expects 16 kHz (or 8 kHz) input
+            vad_audio = resample_audio(audio, sample_rate, self.sample_rate)
+            
+            speech_timestamps = self.get_speech_timestamps(
+                self._to_vad_tensor(vad_audio),
+                self.vad_model,
+                sampling_rate=self.sample_rate,
+                threshold=self.vad_threshold,
+                min_silence_duration_ms=self.min_silence_duration_ms,
+                speech_pad_ms=self.speech_pad_ms
+            )
+        except Exception as e:
+            self.logger.debug("VAD split failed, using whole buffer: %s", e)
+            return len(audio)
+        
+        # Keep the speech segment still in progress for the next chunk
+        completed = [ts for ts in speech_timestamps if ts['end'] < len(vad_audio)]
+        if not completed:
+            return len(audio)
+        
+        return int(completed[-1]['end'] * sample_rate / self.sample_rate)
+    
     def transcribe_array(
         self,
         audio: np.ndarray,
@@ -207,30 +609,53 @@ class ASR:
         Returns:
             Transcribed text
         """
-        self.logger.debug(f"Transcribing audio array: shape {audio.shape}, sr {sample_rate}")
+        self.logger.debug("Transcribing audio array: shape %s, sr %s", audio.shape, sample_rate)
         
         # Resample if needed
         if sample_rate != self.sample_rate:
-            from scipy import signal
-            num_samples = int(len(audio) * self.sample_rate / sample_rate)
-            audio = signal.resample(audio, num_samples)
+            audio = resample_audio(audio, sample_rate, self.sample_rate)
             sample_rate = self.sample_rate
         
-        # Check for speech
-        if self.vad_enabled and not self.detect_speech(audio, sample_rate):
+        if self.is_silent(audio, sample_rate):
             self.logger.debug("No speech detected")
             return ""
         
-        # Transcribe
+        # Transcribe (vad_filter drops non-speech, no separate VAD pass needed)
         lang = language or self.language
         segments, info = self.model.transcribe(
-            audio,
+            self._prepare_audio(audio),
             language=lang,
+            beam_size=self.realtime_beam_size,
+            condition_on_previous_text=self.condition_on_previous_text,
+            chunk_length=self.chunk_length,
+            without_timestamps=True,
             vad_filter=self.vad_enabled
         )
         
-        text = " ".join([segment.text for segment in segments]).strip()
-        return text
+        return self._join_segments(segments)
+    
+    @staticmethod
+    def _prepare_audio(audio: np.ndarray) -> np.ndarray:
+        """Return audio as the C-contiguous float32 array CTranslate2 consumes (no copy if it already is)."""
+        return np.ascontiguousarray(audio, dtype=np.float32)
+    
+    @staticmethod
+    def _join_segments(segments) -> str:
+        """
+        Join Whisper segment texts as they are decoded.
+        
+        Args:
+            segments: Segment generator returned by WhisperModel.transcribe
+            
+        Returns:
+            Transcribed text
+        """
+        parts = []
+        for segment in segments:
+            text = segment.text.strip()
+            if text:
+                parts.append(text)
+        return " ".join(parts)
     
     def transcribe_streaming(
         self,
@@ -250,23 +675,26 @@ class ASR:
         self.logger.info(f"Streaming transcription: {audio_path}")
         
         # Read audio
-        audio, sr = sf.read(audio_path)
-        if len(audio.shape) > 1:
-            audio = audio.mean(axis=1)
+        audio = self.load_audio(audio_path)
         
         # Transcribe with segments
         lang = language or self.language
         segments, info = self.model.transcribe(
-            audio,
+            self._prepare_audio(audio),
             language=lang,
+            beam_size=self.realtime_beam_size,
+            condition_on_previous_text=self.condition_on_previous_text,
+            chunk_length=self.chunk_length,
             vad_filter=self.vad_enabled
         )
         
         # Yield segments
+        log_segments = self.logger.isEnabledFor(logging.DEBUG)
         for segment in segments:
             text = segment.text.strip()
             if text:
-                self.logger.debug(f"Segment [{segment.start:.2f}s - {segment.end:.2f}s]: {text}")
+                if log_segments:
+                    self.logger.debug("Segment [%.2fs - %.2fs]: %s", segment.start, segment.end, text)
                 yield text
     
     def get_model_info(self) -> dict:
@@ -281,35 +709,65 @@ class ASR:
             'language': self.language,
             'device': self.device,
             'compute_type': self.compute_type,
+            'cpu_threads': self.cpu_threads,
+            'num_workers': self.num_workers,
             'vad_enabled': self.vad_enabled,
             'sample_rate': self.sample_rate
         }
 
 
-def record_audio(duration: float = 5.0, sample_rate: int = 16000) -> np.ndarray:
+def record_audio(
+    duration: float = 5.0,
+    sample_rate: int = 16000,
+    on_block: Optional[Callable[[np.ndarray], None]] = None
+) -> np.ndarray:
     """
     Record audio from microphone.
     
+    Samples are captured by an input stream callback into a preallocated
+    buffer; on_block lets the caller process audio while recording goes on.
+    
     Args:
         duration: Recording duration in seconds
         sample_rate: Sample rate
+        on_block: Optional callback receiving each recorded 100 ms block
         
     Returns:
         Recorded audio as numpy array
     """
     import sounddevice as sd
     
+    total = int(duration * sample_rate)
+    audio = np.empty(total, dtype=np.float32)
+    filled = 0
+    blocks: queue.Queue = queue.Queue()
+    
+    def callback(indata, frames, time_info, status):
+        blocks.put(indata[:, 0].copy())
+    
     logging.info(f"Recording for {duration} seconds...")
-    audio = sd.rec(
-        int(duration * sample_rate),
+    with sd.InputStream(
         samplerate=sample_rate,
         channels=1,
-        dtype='float32'
-    )
-    sd.wait()
+        dtype='float32',
+        blocksize=sample_rate // 10,
+        callback=callback
+    ):
+        while filled < total:
+            try:
+                block = blocks.get(timeout=1.0)
+            except queue.Empty:
+                logging.warning("Microphone stopped sending audio")
+                break
+            
+            n = min(len(block), total - filled)
+            audio[filled:filled + n] = block[:n]
+            if on_block:
+                on_block(audio[filled:filled + n])
+            filled += n
     logging.info("Recording finished")
     
-    return audio.flatten()
+    return audio[:filled]
 
 
 def main():
@@ -380,9 +838,16 @@ def main():
             print("\n" + "=" * 60)
             print("🎯 TRANSCRIPTION (STREAMING)")
             print("=" * 60)
-            for segment in asr.transcribe_streaming(args.audio, language=args.language):
-                print(segment, end=' ', flush=True)
-            print("\n" + "=" * 60)
+            # Write segments in batches rather than flushing stdout for each one
+            buffer = io.StringIO()
+            for i, segment in enumerate(asr.transcribe_streaming(args.audio, language=args.language), 1):
+                buffer.write(segment)
+                buffer.write(' ')
+                if i % 16 == 0:
+                    print(buffer.getvalue(), end='', flush=True)
+                    buffer = io.StringIO()
+            print(buffer.getvalue())
+            print("=" * 60)
         else:
             text = asr.transcribe_file(args.audio, language=args.language)
             print("\n" + "=" * 60)
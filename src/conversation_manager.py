@@ -10,7 +10,6 @@ import logging
 import queue
 import threading
 import time
-from collections import deque
 from pathlib import Path
 from typing import Callable, Optional
 
@@ -19,12 +18,24 @@ import sounddevice as sd
 import soundfile as sf
 import torch
 
-from .utils import Config
+from .asr import load_silero_vad
+from .utils import Config, load_wav_pcm16
 
 
 class ConversationManager:
     """Manages continuous vocal conversation with automatic VAD."""
     
+    # Longest utterance kept; speech is processed once the buffer is full
+    MAX_UTTERANCE_SECONDS = 60
+    
+    # Capture backlog held while the processing thread is busy
+    RING_SECONDS = 10
+    
+    # Start of each session used to measure the ambient noise floor
+    NOISE_CALIBRATION_SECONDS = 0.5
+    # Upper bound of the energy gate, in case someone speaks during calibration
+    MAX_ENERGY_GATE_DBFS = -40
+    
     def __init__(self, config: Config, orchestrator):
         """
         Initialize conversation manager.
@@ -39,8 +50,9 @@ class ConversationManager:
         
         # Audio parameters
         self.sample_rate = config.get('asr.sample_rate', 16000)
-        self.chunk_duration = 0.5  # 500ms chunks
-        self.chunk_size = int(self.sample_rate * self.chunk_duration)
+        # Silero VAD's native window: 512 samples (32 ms) at 16 kHz, 256 at 8 kHz
+        self.chunk_size = 512 if self.sample_rate == 16000 else 256
+        self.chunk_duration = self.chunk_size / self.sample_rate
         
         # VAD parameters
         self.vad_threshold = config.get('conversation.vad_threshold', 0.5)
@@ -48,14 +60,42 @@ class ConversationManager:
         self.min_speech_duration_ms = config.get('conversation.min_speech_duration_ms', 500)
         self.min_silence_duration_ms = config.get('conversation.min_silence_duration_ms', 800)
         
+        # Energy pre-gate: windows quieter than noise_floor_factor x the ambient
+        # level measured at session start skip the VAD model
+        self.energy_gate = config.get('conversation.energy_gate', True)
+        self.noise_floor_factor = config.get('conversation.noise_floor_factor', 3.0)
+        self._calibration_windows = max(1, int(self.NOISE_CALIBRATION_SECONDS / self.chunk_duration))
+        self._reset_energy_gate()
+        
+        # Speak each sentence as soon as it is synthesized, while the LLM goes on
+        self.stream_response = config.get('conversation.stream_response', True)
+        
         # Conversation state
         self.is_running = False
         self.is_listening = False
-        self.audio_queue = queue.Queue()
-        self.speech_buffer = deque(maxlen=100)  # Keep last 50 seconds
         
-        # Results queue for UI updates
-        self.results_queue = queue.Queue()
+        # Single-producer/single-consumer ring of captured chunks: the audio
+        # callback only writes slots and advances _ring_write, the processing
+        # thread only reads them and advances _ring_read
+        self._ring_slots = int(self.RING_SECONDS * self.sample_rate / self.chunk_size)
+        self._ring = np.empty((self._ring_slots, self.chunk_size), dtype=np.float32)
+        self._ring_frames = np.zeros(self._ring_slots, dtype=np.int64)
+        self._ring_write = 0
+        self._ring_read = 0
+        self._ring_overruns = 0
+        
+        # Current utterance, written in place chunk by chunk
+        self._utterance = np.empty(self.sample_rate * self.MAX_UTTERANCE_SECONDS, dtype=np.float32)
+        
+        # Audio just before speech onset (speech_pad_ms), prepended to the
+        # utterance so the first phoneme is not cut by the VAD's reaction time
+        self._preroll = np.zeros(int(self.sample_rate * self.speech_pad_ms / 1000), dtype=np.float32)
+        
+        self._playback_thread: Optional[threading.Thread] = None
+        
+        # Latest result not yet polled by the UI (older unread results are superseded)
+        self._latest_result: Optional[dict] = None
+        self._result_lock = threading.Lock()
         self.latest_transcript = ""
         self.latest_response = ""
         self.latest_audio_path = ""
@@ -76,16 +116,10 @@ class ConversationManager:
         try:
             self.logger.info("Loading Silero VAD for conversation...")
             
-            # Load Silero VAD
-            model, utils = torch.hub.load(
-                repo_or_dir='snakers4/silero-vad',
-                model='silero_vad',
-                force_reload=False,
-                onnx=False
-            )
+            # Own instance: the model keeps streaming state between chunks
+            model, utils = load_silero_vad(self.config.get('asr.vad_onnx', True))
             
             self.vad_model = model
-            self.vad_model.eval()
             
             # Get VAD utilities
             (self.get_speech_timestamps,
@@ -104,8 +138,13 @@ class ConversationManager:
         """
         Detect speech probability in audio chunk.
         
+        The model is stateful: its recurrent state and audio context carry over
+        from the previous window, so chunks must be fed in capture order.
+        Windows below the calibrated energy gate are reported as silence
+        without running the model.
+        
         Args:
-            audio_chunk: Audio data (16kHz, mono)
+            audio_chunk: Audio data (16kHz, mono, one VAD window)
             
         Returns:
             Speech probability (0-1)
@@ -113,12 +152,20 @@ class ConversationManager:
         if self.vad_model is None:
             return 0.5  # Fallback if VAD not available
         
+        if self.energy_gate:
+            # Mean square energy: a single BLAS dot product
+            energy = float(np.dot(audio_chunk, audio_chunk)) / max(len(audio_chunk), 1)
+            if energy < self._silence_energy_threshold:
+                return 0.0
+            if self._calibration_count < self._calibration_windows:
+                self._calibrate_energy_gate(energy)
+        
         try:
-            # Convert to torch tensor
-            audio_tensor = torch.from_numpy(audio_chunk).float()
+            # Ring slots are contiguous float32: the tensor shares their memory
+            audio_tensor = torch.from_numpy(audio_chunk)
             
             # Get speech probability
-            with torch.no_grad():
+            with torch.inference_mode():
                 speech_prob = self.vad_model(audio_tensor, self.sample_rate).item()
             
             return speech_prob
@@ -127,34 +174,85 @@ class ConversationManager:
             self.logger.warning(f"VAD detection error: {e}")
             return 0.5
     
+    def _reset_energy_gate(self) -> None:
+        """Disable the energy gate until the noise floor is measured again."""
+        self._silence_energy_threshold = 0.0
+        self._calibration_energy = 0.0
+        self._calibration_count = 0
+    
+    def _calibrate_energy_gate(self, energy: float) -> None:
+        """
+        Accumulate one window of ambient noise and set the gate once calibrated.
+        
+        Args:
+            energy: Mean square energy of the window
+        """
+        self._calibration_energy += energy
+        self._calibration_count += 1
+        if self._calibration_count < self._calibration_windows:
+            return
+        
+        noise_floor = self._calibration_energy / self._calibration_count
+        max_threshold = 10 ** (self.MAX_ENERGY_GATE_DBFS / 10)
+        self._silence_energy_threshold = min(noise_floor * self.noise_floor_factor, max_threshold)
+        self.logger.debug(
+            "Energy gate calibrated: noise floor %.1f dBFS, threshold %.1f dBFS",
+            10 * np.log10(max(noise_floor, 1e-12)),
+            10 * np.log10(max(self._silence_energy_threshold, 1e-12))
+        )
+    
     def _audio_callback(self, indata, frames, time_info, status):
         """Callback for audio stream."""
         if status:
             self.logger.warning(f"Audio stream status: {status}")
         
-        # Put audio chunk in queue
-        self.audio_queue.put(indata.copy())
+        # Keep one slot free: the consumer may still be reading the last slot it took
+        if self._ring_write - self._ring_read >= self._ring_slots - 1:
+            self._ring_overruns += 1
+            return
+        
+        # Copy the chunk straight into its ring slot (no allocation, no lock);
+        # the assignment also casts to float32 and drops the channel stride
+        slot = self._ring_write % self._ring_slots
+        frames = min(frames, self.chunk_size)
+        self._ring[slot, :frames] = indata[:frames, 0]
+        self._ring_frames[slot] = frames
+        self._ring_write += 1
+    
+    def _next_chunk(self) -> Optional[np.ndarray]:
+        """
+        Take the next captured chunk from the ring.
+        
+        Returns:
+            View of the chunk's ring slot, or None if nothing is pending
+        """
+        if self._ring_read == self._ring_write:
+            return None
+        
+        slot = self._ring_read % self._ring_slots
+        chunk = self._ring[slot, :self._ring_frames[slot]]
+        self._ring_read += 1
+        return chunk
     
     def _process_audio_loop(self):
         """Main loop for processing audio chunks with VAD."""
         self.logger.info("Starting audio processing loop...")
         
-        speech_chunks = []
+        utterance_len = 0
+        preroll_len = 0
         is_speaking = False
         silence_duration = 0
         speech_duration = 0
         
         while self.is_running:
             try:
-                # Get audio chunk from queue (timeout to check is_running)
-                try:
-                    audio_chunk = self.audio_queue.get(timeout=0.1)
-                except queue.Empty:
+                # Get audio chunk from the ring (sleep briefly when empty)
+                audio_chunk = self._next_chunk()
+                if audio_chunk is None:
+                    time.sleep(self.chunk_duration / 2)
                     continue
                 
-                # Convert to mono if stereo
-                if len(audio_chunk.shape) > 1:
-                    audio_chunk = audio_chunk.mean(axis=1)
+                chunk_ms = len(audio_chunk) / self.sample_rate * 1000
                 
                 # Detect speech
                 speech_prob = self._detect_speech_in_chunk(audio_chunk)
@@ -169,65 +267,102 @@ class ConversationManager:
                         is_speaking = True
                         speech_duration = 0
                         silence_duration = 0
+                        
+                        # Start the utterance with the audio preceding the onset
+                        if preroll_len:
+                            self._utterance[:preroll_len] = self._preroll[-preroll_len:]
+                        utterance_len = preroll_len
                     
-                    speech_chunks.append(audio_chunk)
-                    speech_duration += self.chunk_duration * 1000  # ms
+                    speech_duration += chunk_ms
                     silence_duration = 0
                     
-                else:
+                elif is_speaking:
                     # Silence detected
-                    if is_speaking:
-                        silence_duration += self.chunk_duration * 1000  # ms
-                        speech_chunks.append(audio_chunk)  # Keep some silence
-                        
-                        # Check if enough silence to consider speech ended
-                        if (silence_duration >= self.min_silence_duration_ms and
-                            speech_duration >= self.min_speech_duration_ms):
-                            
-                            self.logger.info(f"🛑 Speech ended (duration: {speech_duration:.0f}ms)")
-                            if self.on_status:
-                                self.on_status("⏳ Traitement en cours...")
-                            
-                            # Process the speech
-                            self._process_speech(speech_chunks)
-                            
-                            # Reset
-                            speech_chunks = []
-                            is_speaking = False
-                            silence_duration = 0
-                            speech_duration = 0
+                    silence_duration += chunk_ms  # Keep some silence
+                
+                if not is_speaking:
+                    preroll_len = self._push_preroll(audio_chunk, preroll_len)
+                    continue
+                
+                # Append to the utterance buffer
+                n = min(len(audio_chunk), len(self._utterance) - utterance_len)
+                self._utterance[utterance_len:utterance_len + n] = audio_chunk[:n]
+                utterance_len += n
+                # A full buffer ends the utterance (dropped if too short)
+                end_utterance = utterance_len == len(self._utterance)
+                
+                # Check if enough silence to consider speech ended
+                if ((silence_duration >= self.min_silence_duration_ms or end_utterance) and
+                        speech_duration >= self.min_speech_duration_ms):
+                    
+                    self.logger.info(f"🛑 Speech ended (duration: {speech_duration:.0f}ms)")
+                    if self.on_status:
+                        self.on_status("⏳ Traitement en cours...")
+                    
+                    # Process the speech (view of the buffer, no copy)
+                    self._process_speech(self._utterance[:utterance_len])
+                    end_utterance = True
+                
+                if end_utterance:
+                    # Reset
+                    utterance_len = 0
+                    preroll_len = 0
+                    is_speaking = False
+                    silence_duration = 0
+                    speech_duration = 0
                 
             except Exception as e:
                 self.logger.error(f"Error in audio processing loop: {e}", exc_info=True)
         
+        if self._ring_overruns:
+            self.logger.warning(f"{self._ring_overruns} audio chunks dropped while processing was busy")
         self.logger.info("Audio processing loop stopped")
     
-    def _process_speech(self, speech_chunks: list):
+    def _push_preroll(self, audio_chunk: np.ndarray, preroll_len: int) -> int:
+        """
+        Append a non-speech chunk to the pre-roll, dropping the oldest samples.
+        
+        Args:
+            audio_chunk: Chunk that did not trigger the VAD
+            preroll_len: Number of valid samples currently in the pre-roll
+            
+        Returns:
+            Number of valid samples after the append
+        """
+        size = len(self._preroll)
+        n = len(audio_chunk)
+        if size == 0:
+            return 0
+        if n >= size:
+            self._preroll[:] = audio_chunk[n - size:]
+            return size
+        
+        # Valid samples are kept at the end of the buffer
+        self._preroll[:-n] = self._preroll[n:]
+        self._preroll[-n:] = audio_chunk
+        return min(preroll_len + n, size)
+    
+    def _process_speech(self, audio_data: np.ndarray):
         """
         Process detected speech.
         
         Args:
-            speech_chunks: List of audio chunks
+            audio_data: Utterance audio (16kHz, mono)
         """
         try:
-            # Concatenate chunks
-            audio_data = np.concatenate(speech_chunks)
+            self.logger.info(f"Processing speech ({len(audio_data) / self.sample_rate:.1f}s)")
             
-            # Save to temporary file
-            import tempfile
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp:
-                tmp_path = tmp.name
-                sf.write(tmp_path, audio_data, self.sample_rate)
+            segments = self._start_segment_playback() if self.stream_response else None
+            on_audio_chunk = self._segment_callback(segments)
             
-            self.logger.info(f"Processing speech from {tmp_path}")
-            
-            # Process through orchestrator
-            results = self.orchestrator.process_audio_file(tmp_path)
-            
-            # Clean up temp file
-            import os
-            if os.path.exists(tmp_path):
-                os.remove(tmp_path)
+            # Process through orchestrator (in memory, no temporary file)
+            try:
+                results = self.orchestrator.process_audio_array(
+                    audio_data, self.sample_rate, on_audio_chunk=on_audio_chunk
+                )
+            finally:
+                if segments is not None:
+                    segments.put(None)
             
             # Handle results
             if results.get('success'):
@@ -249,17 +384,26 @@ class ConversationManager:
                 self.latest_response = response
                 self.latest_audio_path = audio_output or ""
                 
-                # Put results in queue
-                self.results_queue.put({
-                    'type': 'result',
-                    'transcript': transcript,
-                    'response': response,
-                    'audio_path': audio_output
-                })
+                # Publish results for polling
+                with self._result_lock:
+                    self._latest_result = {
+                        'type': 'result',
+                        'transcript': transcript,
+                        'response': response,
+                        'audio_path': audio_output
+                    }
                 
-                # Play audio response
-                if audio_output and Path(audio_output).exists():
-                    self._play_audio_file(audio_output)
+                # Play audio response on its own thread: VAD keeps listening meanwhile
+                # (streamed responses are already playing sentence by sentence)
+                audio_pcm = results.get('audio_pcm')
+                has_audio = audio_pcm is not None or (audio_output and Path(audio_output).exists())
+                if has_audio and not self.stream_response:
+                    self._playback_thread = threading.Thread(
+                        target=self._play_audio_file,
+                        args=(audio_output, audio_pcm, results.get('audio_sr')),
+                        daemon=True
+                    )
+                    self._playback_thread.start()
                 
                 if self.on_status:
                     self.on_status("✅ Réponse générée. Vous pouvez continuer...")
@@ -275,18 +419,88 @@ class ConversationManager:
             if self.on_status:
                 self.on_status(f"❌ Erreur: {str(e)}")
     
-    def _play_audio_file(self, audio_path: str):
+    def _start_segment_playback(self) -> queue.Queue:
+        """
+        Start a playback thread for the segments of one streamed response.
+        
+        Returns:
+            Queue receiving (audio, sample rate) segments, then None at the end
+        """
+        segments: queue.Queue = queue.Queue()
+        self._playback_thread = threading.Thread(
+            target=self._play_segments,
+            args=(segments, self._playback_thread),
+            daemon=True
+        )
+        self._playback_thread.start()
+        return segments
+    
+    @staticmethod
+    def _segment_callback(segments: Optional[queue.Queue]) -> Optional[Callable[[str], None]]:
+        """
+        Build the callback feeding synthesized segment files to playback.
+        
+        Args:
+            segments: Queue of a segment playback thread, or None
+            
+        Returns:
+            Callback receiving segment file paths, or None without playback
+        """
+        if segments is None:
+            return None
+        
+        def on_audio_chunk(segment_path: str) -> None:
+            # Read right away: segment files are removed once joined
+            loaded = load_wav_pcm16(segment_path)
+            if loaded is not None:
+                segments.put(loaded)
+        
+        return on_audio_chunk
+    
+    def _play_segments(self, segments: queue.Queue, previous: Optional[threading.Thread]):
+        """
+        Play response segments in order as they arrive.
+        
+        Args:
+            segments: Queue of (audio, sample rate) tuples, ended by None
+            previous: Playback thread of the previous response, finished first
+        """
+        if previous is not None:
+            previous.join()
+        
+        try:
+            while self.is_running:
+                segment = segments.get()
+                if segment is None:
+                    break
+                sd.play(*segment)
+                sd.wait()
+            
+            self.logger.info("Audio playback finished")
+            
+        except Exception as e:
+            self.logger.error(f"Error playing audio: {e}")
+    
+    def _play_audio_file(
+        self,
+        audio_path: Optional[str],
+        audio_data: Optional[np.ndarray] = None,
+        sample_rate: Optional[int] = None
+    ):
         """
         Play audio file.
         
         Args:
             audio_path: Path to audio file
+            audio_data: Samples already in memory (the file is then not read)
+            sample_rate: Sample rate of audio_data
         """
         try:
             self.logger.info(f"Playing audio: {audio_path}")
             
-            # Load audio
-            audio_data, sample_rate = sf.read(audio_path)
+            # Load audio only when the samples were not handed over
+            if audio_data is None or not sample_rate:
+                audio_data, sample_rate = sf.read(audio_path)
             
             # Play
             sd.play(audio_data, sample_rate)
@@ -306,12 +520,19 @@ class ConversationManager:
         self.logger.info("🎤 Starting conversation mode...")
         
         self.is_running = True
+        self._ring_write = self._ring_read = self._ring_overruns = 0
+        
+        # Start from a clean VAD state, not the end of the previous session
+        if self.vad_model is not None:
+            self.vad_model.reset_states()
+        self._reset_energy_gate()
         
         # Start audio stream
         try:
             self.audio_stream = sd.InputStream(
                 samplerate=self.sample_rate,
                 channels=1,
+                dtype='float32',  # Same layout as the ring: slots are filled without conversion
                 callback=self._audio_callback,
                 blocksize=self.chunk_size
             )
@@ -345,6 +566,10 @@ class ConversationManager:
         
         self.is_running = False
         
+        # Cut any response still playing
+        if self._playback_thread is not None and self._playback_thread.is_alive():
+            sd.stop()
+        
         # Stop audio stream
         if hasattr(self, 'audio_stream'):
             self.audio_stream.stop()
@@ -384,9 +609,8 @@ class ConversationManager:
         Poll for new results (non-blocking).
         
         Returns:
-            Latest result from queue or None
+            Latest result since the previous poll, or None
         """
-        try:
-            return self.results_queue.get_nowait()
-        except queue.Empty:
-            return None
+        with self._result_lock:
+            result, self._latest_result = self._latest_result, None
+        return result
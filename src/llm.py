@@ -6,35 +6,61 @@ specialized tutoring system that provides progressive hints.
 """
 
 import argparse
+import contextlib
 import logging
 import os
+import re
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Generator, List, Optional
+from typing import Dict, Generator, List, Optional, Tuple, Union
 
-from llama_cpp import Llama
+from llama_cpp import Llama, LlamaDiskCache, LlamaRAMCache, llama_supports_gpu_offload
 
+from .llm_server import LlamaServerClient
+from .prompts import TUTOR_SYSTEM_PROMPT
 from .utils import Config, get_config, setup_logging
 
+# llama.cpp models shared by all TutorLLM instances, keyed on their load settings.
+# Each model comes with the lock that serializes its use: a llama.cpp context
+# (and its KV cache) runs one generation at a time, whichever instance asks.
+_MODEL_CACHE: Dict[Tuple, Tuple[Llama, threading.Lock]] = {}
+_MODEL_CACHE_LOCK = threading.Lock()
+
 
 class TutorLLM:
     """Local LLM for educational tutoring with progressive hints."""
     
     # Tutor system prompt
-    SYSTEM_PROMPT = """Tu es un tuteur pédagogique bienveillant et patient. Ton rôle est d'aider les élèves à comprendre par eux-mêmes sans donner directement la réponse complète.
-
-Principes importants :
-- Ne donne JAMAIS la solution complète directement
-- Fournis des indices progressifs en 3 niveaux de difficulté
-- Encourage l'élève à réfléchir
-- Utilise des exemples concrets et des analogies
-- Reste positif et motivant
-
-Structure de réponse pour une question :
-1. **Indice Niveau 1 (Léger)** : Question guidante ou rappel de concept
-2. **Indice Niveau 2 (Moyen)** : Méthode ou approche à utiliser
-3. **Indice Niveau 3 (Fort)** : Début de résolution mais sans la réponse finale
-
-N'oublie pas : l'objectif est que l'élève trouve lui-même la solution !"""
+    SYSTEM_PROMPT = TUTOR_SYSTEM_PROMPT
+    
+    # Temperatures below this decode greedily
+    GREEDY_TEMPERATURE = 1e-5
+    
+    # Generation stops when the model starts a new question or runs on blank lines
+    STOP_SEQUENCES = ["Question de l'élève:", "\n\n\n"]
+    
+    # A hint header line ("**Indice Niveau 2 (Moyen)** :", "Hint 3", ...)
+    _HINT_RE = re.compile(r'^.*?(?:niveau|indice|hint)[ \t]*([123]).*$', re.IGNORECASE | re.MULTILINE)
+    # Blank line inside a hint section
+    _BLANK_LINE_RE = re.compile(r'\n[ \t\r]*(?=\n)')
+    
+    # Display names of the subjects, as written in the prompt
+    SUBJECT_NAMES = {
+        'maths': 'Mathématiques',
+        'physique': 'Physique',
+        'anglais': 'Anglais'
+    }
+    
+    # Tokenized document blocks kept for reuse
+    CONTEXT_TOKEN_CACHE_SIZE = 64
+    
+    # ggml type IDs accepted for the KV cache (type_k / type_v)
+    KV_CACHE_TYPES = {'f16': 1, 'q4_0': 2, 'q8_0': 8}
+    
+    # Quantization tag of a GGUF file name, e.g. ".Q4_K_M.gguf" or ".IQ2_XXS.gguf"
+    _QUANT_SUFFIX_RE = re.compile(r'\.(?:I?Q\d\w*|F16|BF16|F32)\.gguf$', re.IGNORECASE)
     
     def __init__(self, config: Config):
         """
@@ -48,46 +74,200 @@ N'oublie pas : l'objectif est que l'élève trouve lui-même la solution !"""
         
         # Get LLM parameters
         self.model_path = config.get('llm.model_path', 'models/llm/phi-3-mini-4k-instruct.Q4_K_M.gguf')
+        self.quant_variant = config.get('llm.quant_variant')
+        if self.quant_variant:
+            self.model_path = self._with_quant_variant(self.model_path, self.quant_variant)
         self.n_ctx = config.get('llm.n_ctx', 4096)
         self.n_threads = config.get('llm.n_threads', 4)
-        self.n_gpu_layers = config.get('llm.n_gpu_layers', 35)
+        self.n_gpu_layers = config.get('llm.n_gpu_layers', -1)
+        self.n_batch = config.get('llm.n_batch', 512)
+        self.n_ubatch = min(config.get('llm.n_ubatch', 512), self.n_batch)
+        self.flash_attn = config.get('llm.flash_attn', True)
+        self.offload_kqv = config.get('llm.offload_kqv', True)
+        self.kv_cache_type = config.get('llm.kv_cache_type', 'q8_0')
+        # Weights are mapped from the file (paged in on demand, shared between
+        # processes); mlock pins them in RAM at the cost of a slower start
+        self.use_mmap = config.get('llm.use_mmap', True)
+        self.use_mlock = config.get('llm.use_mlock', False)
         self.temperature = config.get('llm.temperature', 0.7)
         self.top_p = config.get('llm.top_p', 0.9)
         self.top_k = config.get('llm.top_k', 40)
         self.max_tokens = config.get('llm.max_tokens', 512)
+        # Prompt tokens allowed so that the answer still fits in the context window
+        self.max_prompt_tokens = config.get('llm.max_prompt_tokens') or self.n_ctx - self.max_tokens
         self.repeat_penalty = config.get('llm.repeat_penalty', 1.1)
         self.stream = config.get('llm.stream', True)
         
+        # KV-state cache for prompt prefixes (system prompt + retrieved documents)
+        self.kv_cache_enabled = config.get('llm.kv_cache_enabled', False)
+        self.kv_cache_dir = config.get('llm.kv_cache_dir')
+        self.kv_cache_capacity_mb = config.get('llm.kv_cache_capacity_mb', 1024)
+        
         # Tutor settings
         self.progressive_hints = config.get('llm.progressive_hints', True)
         self.hint_levels = config.get('llm.hint_levels', 3)
         
-        # Check if model exists
-        if not os.path.exists(self.model_path):
+        # Shared llama.cpp server: concurrent students are batched together
+        self.server_url = config.get('llm.server_url')
+        
+        # Requests the backend decodes together: the server's slots, or one
+        # at a time for the in-process model
+        self.parallel_requests = config.get('llm.server_parallel', 4) if self.server_url else 1
+        
+        # Lock shared by every instance using the same in-process model
+        # (the server has its own slots)
+        self._generation_lock: Optional[threading.Lock] = None
+        
+        if self.server_url:
+            self.model = LlamaServerClient(self.server_url, config.get('llm.server_timeout', 120.0))
+            # The server keeps each slot's prompt cache itself
+            self.kv_cache_enabled = False
+            self.logger.info(f"Using llama.cpp server: {self.server_url}")
+        else:
+            self._load_model()
+        
+        if self.kv_cache_enabled:
+            self._init_kv_cache()
+        
+        # System prompt with the subject already embedded. Its tokens never
+        # change: they are computed on first use (a call to the server, if any)
+        self._subject_prompts = {
+            subject: self.SYSTEM_PROMPT + self._subject_line(subject) for subject in self.SUBJECT_NAMES
+        }
+        self._subject_prompt_tokens: Dict[Optional[str], List[int]] = {}
+        self._context_tokens: "OrderedDict[str, List[int]]" = OrderedDict()
+        # Batched questions tokenize their prompts from several threads
+        self._token_cache_lock = threading.Lock()
+        
+        # Conversation history
+        self.conversation_history: List[Dict[str, str]] = []
+    
+    def _load_model(self) -> None:
+        """Load the GGUF model in-process."""
+        # Check if model exists (single stat, also gives the file size)
+        try:
+            model_size_mb = os.stat(self.model_path).st_size >> 20
+        except FileNotFoundError:
             raise FileNotFoundError(
                 f"LLM model not found at {self.model_path}. "
                 f"Please download it first."
             )
         
-        # Initialize model
-        self.logger.info(f"Loading LLM model: {self.model_path}")
-        self.logger.info(f"Context window: {self.n_ctx}, GPU layers: {self.n_gpu_layers}")
+        if model_size_mb < 100:
+            self.logger.warning(
+                f"LLM model is only {model_size_mb} MB, the download may be truncated: {self.model_path}"
+            )
         
-        try:
-            self.model = Llama(
-                model_path=self.model_path,
-                n_ctx=self.n_ctx,
-                n_threads=self.n_threads,
-                n_gpu_layers=self.n_gpu_layers,
-                verbose=False
+        # Decode is memory-bandwidth bound: unquantized weights cost 3-4x per token
+        quant = self._QUANT_SUFFIX_RE.search(self.model_path)
+        quant = quant.group(0)[1:-len('.gguf')].upper() if quant else None
+        if quant is None or quant in ('F16', 'BF16', 'F32'):
+            self.logger.warning(
+                f"LLM model is not 4/5-bit quantized ({quant or 'unknown type'}), "
+                f"prefer a Q4_K_M or Q5_K_M GGUF (see llm.quant_variant)"
             )
-            self.logger.info("✅ LLM model loaded successfully")
-        except Exception as e:
-            self.logger.error(f"Error loading LLM model: {e}")
-            raise
+        else:
+            self.logger.info(f"LLM quantization: {quant}")
         
-        # Conversation history
-        self.conversation_history: List[Dict[str, str]] = []
+        # CPU-only wheel: llama.cpp would ignore the layers, say so explicitly
+        if self.n_gpu_layers != 0 and not llama_supports_gpu_offload():
+            self.logger.warning("llama-cpp-python was built without GPU support, running on CPU")
+            self.n_gpu_layers = 0
+        
+        kv_type = self.KV_CACHE_TYPES.get(self.kv_cache_type)
+        if kv_type is None:
+            self.logger.warning(f"Unknown KV cache type '{self.kv_cache_type}', using f16")
+            kv_type = self.KV_CACHE_TYPES['f16']
+        elif kv_type != self.KV_CACHE_TYPES['f16'] and not self.flash_attn:
+            # llama.cpp only supports a quantized V cache with flash attention
+            self.logger.warning("Quantized KV cache requires flash_attn, using f16")
+            kv_type = self.KV_CACHE_TYPES['f16']
+        
+        key = (os.path.abspath(self.model_path), self.n_ctx, self.n_threads, self.n_gpu_layers,
+               self.n_batch, self.n_ubatch, self.flash_attn, self.offload_kqv, kv_type,
+               self.use_mmap, self.use_mlock)
+        
+        with _MODEL_CACHE_LOCK:
+            cached = _MODEL_CACHE.get(key)
+            if cached is not None:
+                self.logger.info(f"Reusing loaded LLM model: {self.model_path}")
+                self.model, self._generation_lock = cached
+                return
+            
+            # Initialize model
+            self.logger.info(f"Loading LLM model: {self.model_path}")
+            self.logger.info(f"Context window: {self.n_ctx}, GPU layers: {self.n_gpu_layers}")
+            
+            try:
+                model = Llama(
+                    model_path=self.model_path,
+                    n_ctx=self.n_ctx,
+                    n_threads=self.n_threads,
+                    n_gpu_layers=self.n_gpu_layers,
+                    n_batch=self.n_batch,
+                    n_ubatch=self.n_ubatch,
+                    flash_attn=self.flash_attn,
+                    offload_kqv=self.offload_kqv,
+                    type_k=kv_type,
+                    type_v=kv_type,
+                    use_mmap=self.use_mmap,
+                    use_mlock=self.use_mlock,
+                    # Only the last position's logits are sampled, no embeddings needed
+                    logits_all=False,
+                    embedding=False,
+                    verbose=False
+                )
+                self.logger.info("✅ LLM model loaded successfully")
+            except Exception as e:
+                self.logger.error(f"Error loading LLM model: {e}")
+                raise
+            
+            self.model = model
+            self._generation_lock = threading.Lock()
+            _MODEL_CACHE[key] = (self.model, self._generation_lock)
+    
+    @classmethod
+    def _with_quant_variant(cls, model_path: str, quant_variant: str) -> str:
+        """
+        Point a GGUF path at another quantization of the same model.
+        
+        Args:
+            model_path: Configured model path (e.g. ``phi-3.Q4_K_M.gguf``)
+            quant_variant: Quantization tag (e.g. ``Q4_0``, ``IQ2_XXS``)
+            
+        Returns:
+            Path with the quantization tag replaced (or appended)
+        """
+        suffix = f".{quant_variant}.gguf"
+        if cls._QUANT_SUFFIX_RE.search(model_path):
+            return cls._QUANT_SUFFIX_RE.sub(suffix, model_path)
+        return re.sub(r'\.gguf$', '', model_path, flags=re.IGNORECASE) + suffix
+    
+    def _init_kv_cache(self) -> None:
+        """
+        Attach a KV-state cache to the model.
+        
+        llama.cpp restores the longest cached prompt prefix before evaluating,
+        so questions that retrieve the same documents skip their prefill.
+        """
+        # Shared model: the cache is read and written while generating, so it
+        # is attached under the model's lock, once (the first instance wins)
+        with self._generation_guard():
+            if self.model.cache is not None:
+                return
+            
+            capacity_bytes = int(self.kv_cache_capacity_mb * 1024 * 1024)
+            try:
+                if self.kv_cache_dir:
+                    cache = LlamaDiskCache(cache_dir=self.kv_cache_dir, capacity_bytes=capacity_bytes)
+                    self.logger.info(f"KV cache on disk: {self.kv_cache_dir} ({self.kv_cache_capacity_mb} MB)")
+                else:
+                    cache = LlamaRAMCache(capacity_bytes=capacity_bytes)
+                    self.logger.info(f"KV cache in RAM ({self.kv_cache_capacity_mb} MB)")
+                self.model.set_cache(cache)
+            except Exception as e:
+                self.logger.warning(f"Could not enable KV cache: {e}")
+                self.kv_cache_enabled = False
     
     def build_prompt(
         self,
@@ -106,37 +286,204 @@ N'oublie pas : l'objectif est que l'élève trouve lui-même la solution !"""
         Returns:
             Formatted prompt
         """
-        prompt_parts = [self.SYSTEM_PROMPT]
-        
-        # Add subject if provided
-        if subject:
-            subject_names = {
-                'maths': 'Mathématiques',
-                'physique': 'Physique',
-                'anglais': 'Anglais'
-            }
-            prompt_parts.append(f"\nMatière : {subject_names.get(subject, subject)}")
-        
-        # Add RAG context if available
-        if context:
-            prompt_parts.append(f"\nDocuments de référence :\n{context}")
-        
-        # Add question
-        prompt_parts.append(f"\nQuestion de l'élève : {question}")
+        system_prompt = self._subject_prompts.get(subject) or self.SYSTEM_PROMPT + self._subject_line(subject)
+        return system_prompt + self._prompt_context(context) + self._prompt_tail(question)
+    
+    def _subject_line(self, subject: Optional[str]) -> str:
+        """Prompt text naming the subject (empty without subject)."""
+        if not subject:
+            return ""
+        return f"\n\nMatière : {self.SUBJECT_NAMES.get(subject, subject)}"
+    
+    def _prompt_context(self, context: Optional[str]) -> str:
+        """Prompt text holding the RAG documents (empty without context)."""
+        if not context:
+            return ""
+        return f"\n\nDocuments de référence :\n{context}"
+    
+    def _prompt_tail(self, question: str) -> str:
+        """Prompt text from the question to the end."""
+        tail = f"\n\nQuestion de l'élève : {question}"
         
         # Add instruction for progressive hints
         if self.progressive_hints:
-            prompt_parts.append(
-                f"\nFournis {self.hint_levels} indices progressifs pour aider l'élève "
+            tail += (
+                f"\n\nFournis {self.hint_levels} indices progressifs pour aider l'élève "
                 "à trouver la réponse par lui-même. N'oublie pas : ne donne JAMAIS "
                 "la solution complète."
             )
         
-        return "\n".join(prompt_parts)
+        return tail
+    
+    def build_prompt_tokens(
+        self,
+        question: str,
+        context: Optional[str] = None,
+        subject: Optional[str] = None
+    ) -> List[int]:
+        """
+        Build the tokenized prompt, reusing the pre-tokenized system prompt.
+        
+        The RAG context should already fit context_token_budget (the retriever
+        drops its lowest-ranked chunks); as a last resort it is cut, at the
+        token level, when the prompt would not leave max_tokens of room for
+        the answer in the context window.
+        
+        Args:
+            question: Student's question
+            context: Optional RAG context
+            subject: Optional subject (maths, physique, anglais)
+            
+        Returns:
+            Prompt token IDs
+        """
+        tokens = self._tokenize_prompt(question, context, subject)
+        
+        overflow = len(tokens) - self.max_prompt_tokens
+        if overflow > 0 and context:
+            context_tokens = self.model.tokenize(context.encode('utf-8'), add_bos=False)
+            # Small margin: tokens can merge differently at the cut
+            keep = max(len(context_tokens) - overflow - 8, 0)
+            self.logger.warning(
+                f"Prompt exceeds {self.max_prompt_tokens} tokens, "
+                f"keeping {keep}/{len(context_tokens)} context tokens"
+            )
+            context = self.model.detokenize(context_tokens[:keep]).decode('utf-8', errors='ignore')
+            tokens = self._tokenize_prompt(question, context or None, subject)
+        
+        if len(tokens) > self.max_prompt_tokens:
+            self.logger.warning(f"Prompt still has {len(tokens)} tokens (budget: {self.max_prompt_tokens})")
+        
+        return tokens
+    
+    def _tokenize_prompt(
+        self,
+        question: str,
+        context: Optional[str],
+        subject: Optional[str]
+    ) -> List[int]:
+        """
+        Tokenize a prompt piece by piece.
+        
+        The system prompt of each subject is tokenized once, the documents
+        once per distinct retrieval (they recur across questions), so only the
+        question is tokenized on every call.
+        """
+        prefix_tokens = self._system_prompt_tokens(subject)
+        context_tokens = self._context_prompt_tokens(context)
+        return prefix_tokens + context_tokens + self._tokenize_fragment(self._prompt_tail(question))
+    
+    def _context_prompt_tokens(self, context: Optional[str]) -> List[int]:
+        """Tokens of the prompt text holding the documents, kept in an LRU."""
+        context_text = self._prompt_context(context)
+        with self._token_cache_lock:
+            context_tokens = self._context_tokens.get(context_text)
+            if context_tokens is not None:
+                self._context_tokens.move_to_end(context_text)
+        if context_tokens is None:
+            context_tokens = self._tokenize_fragment(context_text)
+            with self._token_cache_lock:
+                self._context_tokens[context_text] = context_tokens
+                if len(self._context_tokens) > self.CONTEXT_TOKEN_CACHE_SIZE:
+                    self._context_tokens.popitem(last=False)
+        return context_tokens
+    
+    def count_context_tokens(self, context: str) -> int:
+        """
+        Number of prompt tokens a RAG context takes.
+        
+        The tokens are cached, so building the prompt with this context
+        afterwards does not tokenize it again.
+        
+        Args:
+            context: RAG context
+            
+        Returns:
+            Token count
+        """
+        return len(self._context_prompt_tokens(context))
+    
+    def context_token_budget(self, question: str, subject: Optional[str] = None) -> int:
+        """
+        Tokens left for the RAG context in a prompt for this question.
+        
+        Args:
+            question: Student's question
+            subject: Optional subject (maths, physique, anglais)
+            
+        Returns:
+            Token budget (may be 0 or less for very long questions)
+        """
+        return self.max_prompt_tokens - len(self._tokenize_prompt(question, None, subject))
+    
+    def _system_prompt_tokens(self, subject: Optional[str]) -> List[int]:
+        """Tokens of the system prompt of a subject, tokenized once."""
+        with self._token_cache_lock:
+            tokens = self._subject_prompt_tokens.get(subject)
+        if tokens is None:
+            if subject:
+                tokens = self._system_prompt_tokens(None) + self._tokenize_fragment(self._subject_line(subject))
+            else:
+                tokens = self.model.tokenize(self.SYSTEM_PROMPT.encode('utf-8'), add_bos=True)
+            with self._token_cache_lock:
+                self._subject_prompt_tokens[subject] = tokens
+        return tokens
+    
+    def _tokenize_fragment(self, text: str) -> List[int]:
+        """Tokenize a prompt fragment that follows other tokens (no BOS)."""
+        return self.model.tokenize(text.encode('utf-8'), add_bos=False) if text else []
+    
+    def _completion_kwargs(
+        self,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None
+    ) -> Dict:
+        """
+        Build the sampling arguments shared by generate and generate_streaming.
+        
+        Args:
+            max_tokens: Optional override for max tokens
+            temperature: Optional override for temperature
+            
+        Returns:
+            Keyword arguments for the llama-cpp completion call
+        """
+        if temperature is None:
+            temperature = self.temperature
+        
+        kwargs = {
+            'max_tokens': max_tokens or self.max_tokens,
+            'temperature': temperature,
+            'top_p': self.top_p,
+            'top_k': self.top_k,
+            'repeat_penalty': self.repeat_penalty,
+            'stop': self.STOP_SEQUENCES
+        }
+        
+        if temperature < self.GREEDY_TEMPERATURE:
+            # Greedy decoding: argmax only, skip the penalty and filtering passes
+            kwargs.update(temperature=0.0, top_k=1, top_p=1.0, repeat_penalty=1.0)
+        
+        return kwargs
+    
+    def warmup(self) -> None:
+        """
+        Generate one token so the first question does not pay the cold start.
+        
+        This pages in the weights, sets up the GPU kernels and buffers, and
+        leaves the system prompt evaluated in the KV cache.
+        """
+        start_time = time.time()
+        self.generate(self.build_prompt_tokens("Bonjour"), max_tokens=1, stream=False)
+        self.logger.info(f"LLM warmed up in {time.time() - start_time:.2f}s")
+    
+    def _generation_guard(self):
+        """Lock held while the in-process model generates (no-op for the server)."""
+        return self._generation_lock or contextlib.nullcontext()
     
     def generate(
         self,
-        prompt: str,
+        prompt: Union[str, List[int]],
         max_tokens: Optional[int] = None,
         temperature: Optional[float] = None,
         stream: Optional[bool] = None
@@ -145,7 +492,7 @@ N'oublie pas : l'objectif est que l'élève trouve lui-même la solution !"""
         Generate response from LLM.
         
         Args:
-            prompt: Input prompt
+            prompt: Input prompt (text or token IDs)
             max_tokens: Optional override for max tokens
             temperature: Optional override for temperature
             stream: Optional override for streaming
@@ -153,39 +500,25 @@ N'oublie pas : l'objectif est que l'élève trouve lui-même la solution !"""
         Returns:
             Generated text
         """
-        max_tok = max_tokens or self.max_tokens
-        temp = temperature or self.temperature
         do_stream = stream if stream is not None else self.stream
+        if do_stream:
+            # Collect streamed output
+            return "".join(self.generate_streaming(prompt, max_tokens, temperature))
         
-        self.logger.debug(f"Generating response (max_tokens={max_tok}, temp={temp})")
+        kwargs = self._completion_kwargs(max_tokens, temperature)
+        self.logger.debug("Generating response (max_tokens=%s, temp=%s)", kwargs['max_tokens'], kwargs['temperature'])
         
         try:
-            output = self.model(
-                prompt,
-                max_tokens=max_tok,
-                temperature=temp,
-                top_p=self.top_p,
-                top_k=self.top_k,
-                repeat_penalty=self.repeat_penalty,
-                stop=["Question de l'élève:", "\n\n\n"],
-                stream=do_stream
-            )
-            
-            if do_stream:
-                # Collect streamed output
-                text = ""
-                for chunk in output:
-                    text += chunk['choices'][0]['text']
-                return text
-            else:
-                return output['choices'][0]['text']
+            with self._generation_guard():
+                output = self.model(prompt, stream=False, **kwargs)
+            return output['choices'][0]['text']
         except Exception as e:
             self.logger.error(f"Error generating response: {e}")
             raise
     
     def generate_streaming(
         self,
-        prompt: str,
+        prompt: Union[str, List[int]],
         max_tokens: Optional[int] = None,
         temperature: Optional[float] = None
     ) -> Generator[str, None, None]:
@@ -193,32 +526,21 @@ N'oublie pas : l'objectif est que l'élève trouve lui-même la solution !"""
         Generate response with streaming output.
         
         Args:
-            prompt: Input prompt
+            prompt: Input prompt (text or token IDs)
             max_tokens: Optional override for max tokens
             temperature: Optional override for temperature
             
         Yields:
             Text chunks as they are generated
         """
-        max_tok = max_tokens or self.max_tokens
-        temp = temperature or self.temperature
-        
         try:
-            output = self.model(
-                prompt,
-                max_tokens=max_tok,
-                temperature=temp,
-                top_p=self.top_p,
-                top_k=self.top_k,
-                repeat_penalty=self.repeat_penalty,
-                stop=["Question de l'élève:", "\n\n\n"],
-                stream=True
-            )
-            
-            for chunk in output:
-                text = chunk['choices'][0]['text']
-                if text:
-                    yield text
+            with self._generation_guard():
+                output = self.model(prompt, stream=True, **self._completion_kwargs(max_tokens, temperature))
+                
+                for chunk in output:
+                    text = chunk['choices'][0]['text']
+                    if text:
+                        yield text
         except Exception as e:
             self.logger.error(f"Error in streaming generation: {e}")
             raise
@@ -245,7 +567,7 @@ N'oublie pas : l'objectif est que l'élève trouve lui-même la solution !"""
         self.logger.info(f"Answering question: '{question[:50]}...'")
         
         # Build prompt
-        prompt = self.build_prompt(question, context, subject)
+        prompt = self.build_prompt_tokens(question, context, subject)
         
         # Generate response
         if stream:
@@ -271,25 +593,14 @@ N'oublie pas : l'objectif est que l'élève trouve lui-même la solution !"""
             'niveau_3': ''
         }
         
-        # Simple parsing based on keywords
-        lines = response.split('\n')
-        current_level = None
-        
-        for line in lines:
-            line_lower = line.lower()
-            
-            if 'niveau 1' in line_lower or 'indice 1' in line_lower or 'hint 1' in line_lower:
-                current_level = 'niveau_1'
-            elif 'niveau 2' in line_lower or 'indice 2' in line_lower or 'hint 2' in line_lower:
-                current_level = 'niveau_2'
-            elif 'niveau 3' in line_lower or 'indice 3' in line_lower or 'hint 3' in line_lower:
-                current_level = 'niveau_3'
-            elif current_level and line.strip():
-                hints[current_level] += line + '\n'
-        
-        # Clean up hints
-        for key in hints:
-            hints[key] = hints[key].strip()
+        # One scan finds the header lines; each hint is the text up to the next one
+        headers = list(self._HINT_RE.finditer(response))
+        for i, header in enumerate(headers):
+            end = headers[i + 1].start() if i + 1 < len(headers) else len(response)
+            section = self._BLANK_LINE_RE.sub('', response[header.end():end]).strip()
+            if section:
+                key = f"niveau_{header.group(1)}"
+                hints[key] = f"{hints[key]}\n{section}" if hints[key] else section
         
         return hints
     
@@ -320,10 +631,16 @@ N'oublie pas : l'objectif est que l'élève trouve lui-même la solution !"""
         """
         return {
             'model_path': self.model_path,
+            'server_url': self.server_url,
+            'quant_variant': self.quant_variant,
             'n_ctx': self.n_ctx,
             'n_gpu_layers': self.n_gpu_layers,
+            'n_batch': self.n_batch,
+            'flash_attn': self.flash_attn,
+            'kv_cache_type': self.kv_cache_type,
             'temperature': self.temperature,
             'max_tokens': self.max_tokens,
+            'kv_cache_enabled': self.kv_cache_enabled,
             'progressive_hints': self.progressive_hints,
             'hint_levels': self.hint_levels
         }
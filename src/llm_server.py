@@ -0,0 +1,154 @@
+"""
+LLM Server Module - Client for a shared llama.cpp server.
+
+A llama.cpp server started with ``--parallel N --cont-batching`` decodes the
+requests of several students in the same batches instead of one after the
+other. This client exposes the small part of the ``llama_cpp.Llama`` API used
+by TutorLLM (tokenization and completion calls), so the tutor code is the same
+with an in-process model or a server.
+"""
+
+import json
+import logging
+import urllib.error
+import urllib.request
+from typing import Dict, Generator, List, Optional, Union
+
+
+class LlamaServerClient:
+    """Minimal llama.cpp server client mimicking ``llama_cpp.Llama``."""
+    
+    def __init__(self, base_url: str, timeout: float = 120.0):
+        """
+        Initialize server client.
+        
+        Args:
+            base_url: Server address (e.g. ``http://127.0.0.1:8080``)
+            timeout: Request timeout in seconds
+        """
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.logger = logging.getLogger(__name__)
+    
+    def _post(self, endpoint: str, payload: Dict):
+        """
+        Send a JSON POST request.
+        
+        Args:
+            endpoint: Endpoint path (e.g. ``/completion``)
+            payload: JSON body
+        
+        Returns:
+            Open HTTP response
+        
+        Raises:
+            ConnectionError: If the server cannot be reached
+        """
+        request = urllib.request.Request(
+            self.base_url + endpoint,
+            data=json.dumps(payload).encode('utf-8'),
+            headers={'Content-Type': 'application/json'}
+        )
+        try:
+            return urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError:
+            raise
+        except (urllib.error.URLError, OSError) as e:
+            raise ConnectionError(
+                f"llama.cpp server unreachable at {self.base_url} (llm.server_url): "
+                f"{getattr(e, 'reason', e)}"
+            ) from e
+    
+    def tokenize(self, text: bytes, add_bos: bool = True) -> List[int]:
+        """
+        Tokenize text with the server's model.
+        
+        Args:
+            text: UTF-8 encoded text
+            add_bos: Whether to prepend the BOS token
+        
+        Returns:
+            Token IDs
+        """
+        payload = {'content': text.decode('utf-8'), 'add_special': add_bos}
+        with self._post('/tokenize', payload) as response:
+            return json.load(response)['tokens']
+    
+    def detokenize(self, tokens: List[int]) -> bytes:
+        """
+        Convert token IDs back to text with the server's model.
+        
+        Args:
+            tokens: Token IDs
+        
+        Returns:
+            UTF-8 encoded text
+        """
+        with self._post('/detokenize', {'tokens': tokens}) as response:
+            return json.load(response)['content'].encode('utf-8')
+    
+    def __call__(
+        self,
+        prompt: Union[str, List[int]],
+        max_tokens: int = 512,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        top_k: int = 40,
+        repeat_penalty: float = 1.1,
+        stop: Optional[List[str]] = None,
+        stream: bool = False
+    ):
+        """
+        Run a completion, returning the same structure as ``Llama.__call__``.
+        
+        Args:
+            prompt: Prompt text or token IDs
+            max_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
+            top_p: Nucleus sampling threshold
+            top_k: Top-k sampling
+            repeat_penalty: Repetition penalty
+            stop: Stop sequences
+            stream: Whether to stream the output
+        
+        Returns:
+            Completion dict, or a generator of completion chunks when streaming
+        """
+        payload = {
+            'prompt': prompt,
+            'n_predict': max_tokens,
+            'temperature': temperature,
+            'top_p': top_p,
+            'top_k': top_k,
+            'repeat_penalty': repeat_penalty,
+            'stop': stop or [],
+            'stream': stream,
+            # Reuse the slot's KV cache for the shared prompt prefix
+            'cache_prompt': True
+        }
+        
+        if stream:
+            return self._stream_completion(payload)
+        
+        with self._post('/completion', payload) as response:
+            return {'choices': [{'text': json.load(response)['content']}]}
+    
+    def _stream_completion(self, payload: Dict) -> Generator[Dict, None, None]:
+        """
+        Read a streamed completion (server-sent events).
+        
+        Args:
+            payload: Completion request body
+        
+        Yields:
+            Completion chunks in the ``Llama`` streaming format
+        """
+        with self._post('/completion', payload) as response:
+            for line in response:
+                if not line.startswith(b'data: '):
+                    continue
+                
+                event = json.loads(line[6:])
+                yield {'choices': [{'text': event.get('content', '')}]}
+                if event.get('stop'):
+                    break
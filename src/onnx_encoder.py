@@ -0,0 +1,181 @@
+"""
+ONNX Encoder Module - int8 ONNX Runtime backend for sentence embeddings.
+
+The transformer of a sentence-transformers model is exported to ONNX once,
+quantized to int8 weights, and cached on disk. Encoding then runs on ONNX
+Runtime (already installed for Silero VAD) with tokenization, pooling and
+normalization done with the Hugging Face tokenizer and NumPy. The class
+mimics the part of the ``SentenceTransformer`` API used by the RAG modules.
+"""
+
+import json
+import logging
+import re
+from pathlib import Path
+from typing import List, Union
+
+import numpy as np
+
+from .utils import ensure_dir
+
+
+class OnnxSentenceEncoder:
+    """Sentence encoder running an exported transformer on ONNX Runtime."""
+    
+    ONNX_OPSET = 14
+    # Inputs of the exported graph, in the positional order of the HF forward()
+    MODEL_INPUTS = ('input_ids', 'attention_mask', 'token_type_ids')
+    
+    def __init__(self, model_name: str, cache_dir: str = 'models/onnx', quantize: bool = True):
+        """
+        Initialize ONNX encoder, exporting the model on first use.
+        
+        Args:
+            model_name: sentence-transformers model name or path
+            cache_dir: Directory holding the exported models
+            quantize: Whether to use int8 dynamic quantization of the weights
+        """
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+        
+        self.logger = logging.getLogger(__name__)
+        
+        model_dir = Path(cache_dir) / re.sub(r'[^\w.-]+', '_', model_name)
+        onnx_path = model_dir / ('model.int8.onnx' if quantize else 'model.onnx')
+        
+        if not onnx_path.exists():
+            self._export(model_name, model_dir, quantize)
+        
+        with open(model_dir / 'encoder.json', 'r', encoding='utf-8') as f:
+            settings = json.load(f)
+        self.pooling = settings['pooling']
+        self.max_seq_length = settings['max_seq_length']
+        self.embedding_dim = settings['embedding_dim']
+        
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+        self.session = ort.InferenceSession(str(onnx_path), providers=['CPUExecutionProvider'])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        
+        self.logger.info(f"ONNX encoder loaded: {onnx_path}")
+    
+    def _export(self, model_name: str, model_dir: Path, quantize: bool) -> None:
+        """
+        Export the model's transformer to ONNX, with its tokenizer and settings.
+        
+        Args:
+            model_name: sentence-transformers model name or path
+            model_dir: Output directory
+            quantize: Whether to also write the int8 quantized model
+        """
+        import torch
+        from sentence_transformers import SentenceTransformer
+        
+        self.logger.info(f"Exporting {model_name} to ONNX (first use)...")
+        ensure_dir(str(model_dir))
+        
+        model = SentenceTransformer(model_name, device='cpu')
+        transformer = model[0].auto_model.eval()
+        model[0].tokenizer.save_pretrained(str(model_dir))
+        
+        sample = model[0].tokenizer(["Bonjour"], return_tensors='pt')
+        input_names = [name for name in self.MODEL_INPUTS if name in sample]
+        dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+        dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+        
+        onnx_path = model_dir / 'model.onnx'
+        with torch.no_grad():
+            torch.onnx.export(
+                transformer,
+                tuple(sample[name] for name in input_names),
+                str(onnx_path),
+                input_names=input_names,
+                output_names=['last_hidden_state'],
+                dynamic_axes=dynamic_axes,
+                opset_version=self.ONNX_OPSET
+            )
+        
+        if quantize:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            quantize_dynamic(str(onnx_path), str(model_dir / 'model.int8.onnx'), weight_type=QuantType.QInt8)
+        
+        with open(model_dir / 'encoder.json', 'w', encoding='utf-8') as f:
+            json.dump({
+                'pooling': model[1].get_pooling_mode_str(),
+                'max_seq_length': model.max_seq_length,
+                'embedding_dim': model.get_sentence_embedding_dimension()
+            }, f, indent=2)
+        
+        self.logger.info(f"ONNX export saved: {model_dir}")
+    
+    def get_sentence_embedding_dimension(self) -> int:
+        """Size of the embeddings."""
+        return self.embedding_dim
+    
+    def _pool(self, hidden: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """
+        Pool token states into one vector per sentence.
+        
+        Args:
+            hidden: Token states (batch, sequence, dim)
+            mask: Attention mask (batch, sequence)
+        
+        Returns:
+            Sentence vectors (batch, dim)
+        """
+        if self.pooling == 'cls':
+            return hidden[:, 0]
+        
+        mask = mask[:, :, None].astype(np.float32)
+        if self.pooling == 'max':
+            return np.where(mask > 0, hidden, -1e9).max(axis=1)
+        
+        # mean
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+    
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = False
+    ) -> np.ndarray:
+        """
+        Encode sentences, with the same conventions as ``SentenceTransformer.encode``.
+        
+        Args:
+            sentences: One sentence or a list of sentences
+            batch_size: Sentences per inference call
+            show_progress_bar: Unused, kept for API compatibility
+            convert_to_numpy: Unused, NumPy arrays are always returned
+            normalize_embeddings: Whether to L2-normalize the embeddings
+        
+        Returns:
+            Embedding vector for one sentence, or array with one row per sentence
+        """
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+        
+        embeddings = np.empty((len(sentences), self.embedding_dim), dtype=np.float32)
+        
+        # Length-sorted batches keep padding low
+        order = np.argsort([-len(s) for s in sentences], kind='stable')
+        for start in range(0, len(sentences), batch_size):
+            batch = order[start:start + batch_size]
+            encoded = self.tokenizer(
+                [sentences[i] for i in batch],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors='np'
+            )
+            inputs = {name: encoded[name].astype(np.int64) for name in self.input_names}
+            hidden = self.session.run(None, inputs)[0]
+            embeddings[batch] = self._pool(hidden, encoded['attention_mask'])
+        
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings /= np.clip(norms, 1e-12, None)
+        
+        return embeddings[0] if single else embeddings
@@ -5,12 +5,17 @@ This module orchestrates the complete pipeline: ASR → RAG → LLM → TTS,
 with automatic subject detection and error handling.
 """
 
+import itertools
 import logging
+import os
 import re
+import sqlite3
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple, Union
 
 import numpy as np
 
@@ -24,6 +29,13 @@ from .utils import Config, ensure_dir, format_time, get_config
 class VocalTutorOrchestrator:
     """Orchestrates the complete vocal tutoring pipeline."""
     
+    # Streamed LLM text is sent to TTS once a sentence is complete
+    SENTENCE_END_PATTERN = re.compile(r'[.?!]\s*$')
+    MAX_TOKENS_PER_SEGMENT = 80
+    
+    # Keywords of the current subject that keep it without scanning the others
+    STICKY_SUBJECT_MATCHES = 2
+    
     def __init__(self, config: Config):
         """
         Initialize orchestrator.
@@ -37,6 +49,22 @@ class VocalTutorOrchestrator:
         # Get orchestrator settings
         self.auto_detect_subject = config.get('orchestrator.auto_detect_subject', True)
         self.subject_keywords = config.get('orchestrator.subject_keywords', {})
+        # One alternation per subject, longest keywords first so that a keyword
+        # is not shadowed by one of its prefixes
+        self._subject_patterns = {
+            subject: re.compile('|'.join(
+                re.escape(keyword.lower()) for keyword in sorted(keywords, key=len, reverse=True)
+            ))
+            for subject, keywords in self.subject_keywords.items() if keywords
+        }
+        # A match also counts the keywords nested in it ("équation du second
+        # degré" contains "équation"), which the scan consumes with it
+        self._nested_keywords: Dict[str, Dict[str, FrozenSet[str]]] = {}
+        for subject in self._subject_patterns:
+            lowered = {keyword.lower() for keyword in self.subject_keywords[subject]}
+            self._nested_keywords[subject] = {
+                keyword: frozenset(other for other in lowered if other in keyword) for keyword in lowered
+            }
         self.default_subject = config.get('orchestrator.default_subject', 'maths')
         
         # Initialize components (lazy loading)
@@ -44,10 +72,21 @@ class VocalTutorOrchestrator:
         self._rag: Optional[RAGRetriever] = None
         self._llm: Optional[TutorLLM] = None
         self._tts: Optional[TTS] = None
+        self._tts_executor: Optional[ThreadPoolExecutor] = None
+        self._prefetch_executor: Optional[ThreadPoolExecutor] = None
+        
+        # Response files: session start time + counter, unique even for
+        # responses synthesized within the same second
+        self._audio_dir = ensure_dir(config.get('orchestrator.audio_output_dir', 'outputs/audio'))
+        self._audio_session = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self._audio_counter = itertools.count()
         
         # Conversation state
         self.current_subject: Optional[str] = None
-        self.conversation_history: List[Dict] = []
+        self._history_lock = threading.Lock()
+        self._history_db = self._open_history_db(config.get('orchestrator.history_db'))
+        # Oldest interactions beyond this are deleted (None: keep everything)
+        self.history_max_entries = config.get('orchestrator.history_max_entries', 1000)
         
         self.logger.info("Vocal Tutor Orchestrator initialized")
     
@@ -83,10 +122,54 @@ class VocalTutorOrchestrator:
             self._tts = TTS(self.config)
         return self._tts
     
+    def warmup(self) -> Dict[str, bool]:
+        """
+        Load all models and run a tiny inference through each of them.
+        
+        This moves the cold-start cost (model loading, CUDA kernel setup,
+        KV buffer allocation) out of the first user query. A module that
+        cannot be loaded is skipped with a warning.
+        
+        Returns:
+            Dictionary mapping module name to warmup success
+        """
+        self.logger.info("Warming up models...")
+        start_time = time.time()
+        
+        def warm_asr():
+            # Call Whisper directly: VAD would skip the silent clip
+            silence = np.zeros(self.asr.sample_rate, dtype=np.float32)
+            segments, _ = self.asr.model.transcribe(silence, language=self.asr.language, vad_filter=False)
+            list(segments)
+        
+        def warm_rag():
+            self.rag.generate_query_embedding("Bonjour")
+        
+        def warm_llm():
+            self.llm.warmup()
+        
+        def warm_tts():
+            return self.tts
+        
+        status = {}
+        for name, warm in [('asr', warm_asr), ('rag', warm_rag), ('llm', warm_llm), ('tts', warm_tts)]:
+            try:
+                warm()
+                status[name] = True
+            except Exception as e:
+                self.logger.warning(f"Could not warm up {name}: {e}")
+                status[name] = False
+        
+        self.logger.info(f"Warmup completed in {format_time(time.time() - start_time)}")
+        return status
+    
     def detect_subject(self, text: str) -> str:
         """
         Detect subject from text using keywords.
         
+        The current subject is kept without scanning the others when the text
+        contains at least STICKY_SUBJECT_MATCHES of its keywords.
+        
         Args:
             text: Text to analyze
             
@@ -95,12 +178,24 @@ class VocalTutorOrchestrator:
         """
         text_lower = text.lower()
         
-        # Count keyword matches for each subject
+        # A tutoring session mostly stays on one subject: scan it first and
+        # keep it when the question clearly matches
+        subjects = list(self._subject_patterns)
+        if self.current_subject in self._subject_patterns:
+            subjects.remove(self.current_subject)
+            subjects.insert(0, self.current_subject)
+        
+        # Count the keywords found for each subject (one regex scan each)
         matches = {}
-        for subject, keywords in self.subject_keywords.items():
-            count = sum(1 for keyword in keywords if keyword.lower() in text_lower)
+        for subject in subjects:
+            nested = self._nested_keywords[subject]
+            found = set(self._subject_patterns[subject].findall(text_lower))
+            count = len(frozenset().union(*(nested[keyword] for keyword in found)))
             if count > 0:
                 matches[subject] = count
+            if subject == self.current_subject and count >= self.STICKY_SUBJECT_MATCHES:
+                self.logger.info(f"Subject kept: {subject} (matches: {count})")
+                return subject
         
         if matches:
             # Return subject with most matches
@@ -111,10 +206,51 @@ class VocalTutorOrchestrator:
         self.logger.info(f"No subject detected, using default: {self.default_subject}")
         return self.default_subject
     
+    def resolve_subject(self, question: str, subject: Optional[str] = None) -> str:
+        """
+        Subject a question will be answered in, without changing the current one.
+        
+        Args:
+            question: Question text
+            subject: Optional subject override
+            
+        Returns:
+            The override, the detected subject, or the current/default subject
+        """
+        if subject is not None:
+            return subject
+        if self.auto_detect_subject:
+            return self.detect_subject(question)
+        return self.current_subject or self.default_subject
+    
+    def resolve_subjects(self, questions: List[str], subject: Optional[str] = None) -> List[str]:
+        """
+        Subjects of questions asked in a row, resolved in order.
+        
+        Sticky detection depends on the previous question's subject, so each
+        question is resolved as if the previous ones had been answered; the
+        current subject ends on the last question's.
+        
+        Args:
+            questions: Question texts
+            subject: Optional subject override for all questions
+            
+        Returns:
+            One subject per question
+        """
+        subjects = []
+        for question in questions:
+            self.current_subject = self.resolve_subject(question, subject)
+            subjects.append(self.current_subject)
+        return subjects
+    
     def process_audio_file(
         self,
         audio_path: str,
-        subject: Optional[str] = None
+        subject: Optional[str] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+        on_audio_chunk: Optional[Callable[[str], None]] = None,
+        on_partial_transcript: Optional[Callable[[int, str], None]] = None
     ) -> Dict:
         """
         Process audio file through complete pipeline.
@@ -122,23 +258,90 @@ class VocalTutorOrchestrator:
         Args:
             audio_path: Path to audio file
             subject: Optional subject override
+            on_token: Optional callback receiving LLM tokens as they are generated
+            on_audio_chunk: Optional callback receiving each synthesized sentence file
+            on_partial_transcript: Optional callback receiving (chunk index, text);
+                when given, transcription starts while the file is still being read
             
         Returns:
             Dictionary with results from each stage
         """
         self.logger.info(f"Processing audio file: {audio_path}")
+        
+        def transcribe() -> str:
+            if on_partial_transcript:
+                return self.asr.transcribe_file_chunked(audio_path, on_partial=on_partial_transcript)
+            return self.asr.transcribe_file(audio_path)
+        
+        return self._process_audio(transcribe, {'audio_path': audio_path}, subject, on_token, on_audio_chunk)
+    
+    def process_audio_array(
+        self,
+        audio: np.ndarray,
+        sample_rate: int,
+        subject: Optional[str] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+        on_audio_chunk: Optional[Callable[[str], None]] = None
+    ) -> Dict:
+        """
+        Process in-memory audio through complete pipeline (no file I/O).
+        
+        Args:
+            audio: Mono float32 audio samples
+            sample_rate: Sample rate of audio
+            subject: Optional subject override
+            on_token: Optional callback receiving LLM tokens as they are generated
+            on_audio_chunk: Optional callback receiving each synthesized sentence file
+            
+        Returns:
+            Dictionary with results from each stage
+        """
+        self.logger.info(f"Processing audio array: {len(audio) / sample_rate:.1f}s at {sample_rate}Hz")
+        
+        def transcribe() -> str:
+            return self.asr.transcribe_array(audio, sample_rate=sample_rate)
+        
+        return self._process_audio(transcribe, {}, subject, on_token, on_audio_chunk)
+    
+    def _process_audio(
+        self,
+        transcribe: Callable[[], str],
+        results: Dict,
+        subject: Optional[str],
+        on_token: Optional[Callable[[str], None]],
+        on_audio_chunk: Optional[Callable[[str], None]]
+    ) -> Dict:
+        """
+        Run the ASR → RAG → LLM → TTS pipeline.
+        
+        Args:
+            transcribe: Function running the ASR stage
+            results: Initial results dictionary (input description)
+            subject: Optional subject override
+            on_token: Optional callback receiving LLM tokens as they are generated
+            on_audio_chunk: Optional callback receiving each synthesized sentence file
+            
+        Returns:
+            Dictionary with results from each stage
+        """
         start_time = time.time()
         
-        results = {
-            'audio_path': audio_path,
+        results.update({
             'timestamp': datetime.now().isoformat(),
             'success': False
-        }
+        })
+        
+        # Load RAG/LLM models and the likely subject's index while ASR runs
+        prefetch = self._prefetch_downstream(subject or self.current_subject or self.default_subject)
         
         try:
             # Stage 1: ASR - Transcribe audio
             self.logger.info("Stage 1/4: Transcribing audio...")
-            transcript = self.asr.transcribe_file(audio_path)
+            try:
+                transcript = transcribe()
+            finally:
+                # The lazy RAG/LLM properties must not be entered from two threads
+                wait(prefetch)
             results['transcript'] = transcript
             
             if not transcript or not transcript.strip():
@@ -147,53 +350,10 @@ class VocalTutorOrchestrator:
             
             self.logger.info(f"Transcript: {transcript}")
             
-            # Stage 2: Detect or use provided subject
-            if subject is None and self.auto_detect_subject:
-                subject = self.detect_subject(transcript)
-            elif subject is None:
-                subject = self.current_subject or self.default_subject
-            
-            results['subject'] = subject
-            self.current_subject = subject
-            
-            # Stage 3: RAG - Retrieve relevant context
-            self.logger.info(f"Stage 2/4: Retrieving context for subject '{subject}'...")
-            try:
-                context, sources = self.rag.retrieve_with_context(
-                    transcript,
-                    subject,
-                    top_k=self.config.get('rag.top_k', 3)
-                )
-                results['context'] = context
-                results['sources'] = sources
-                self.logger.info(f"Retrieved {len(sources)} sources")
-            except FileNotFoundError:
-                self.logger.warning(f"RAG index not found for {subject}, proceeding without context")
-                context = None
-                results['context'] = None
-                results['sources'] = []
-            
-            # Stage 4: LLM - Generate response
-            self.logger.info("Stage 3/4: Generating response...")
-            response = self.llm.answer_question(
-                transcript,
-                context=context,
-                subject=subject,
-                stream=False
+            response = self._answer(
+                transcript, results, subject, True, on_token, on_audio_chunk,
+                keep_audio_samples=True
             )
-            results['response'] = response
-            
-            # Parse hints if available
-            hints = self.llm.parse_hints(response)
-            results['hints'] = hints
-            
-            # Stage 5: TTS - Synthesize speech
-            self.logger.info("Stage 4/4: Synthesizing speech...")
-            output_filename = f"response_{datetime.now().strftime('%Y%m%d_%H%M%S')}.wav"
-            output_path = str(Path(self.config.get('orchestrator.audio_output_dir', 'outputs/audio')) / output_filename)
-            
-            audio_path = self.tts.synthesize_to_file(response, output_path)
-            results['audio_output'] = audio_path
             
             # Success
             results['success'] = True
@@ -203,7 +363,7 @@ class VocalTutorOrchestrator:
             self.logger.info(f"✅ Pipeline completed successfully in {format_time(elapsed)}")
             
             # Add to conversation history
-            self.add_to_history(transcript, response, subject)
+            self.add_to_history(transcript, response, results['subject'])
             
         except Exception as e:
             self.logger.error(f"Error in pipeline: {e}", exc_info=True)
@@ -215,7 +375,11 @@ class VocalTutorOrchestrator:
         self,
         question: str,
         subject: Optional[str] = None,
-        generate_audio: bool = True
+        generate_audio: bool = True,
+        on_token: Optional[Callable[[str], None]] = None,
+        on_audio_chunk: Optional[Callable[[str], None]] = None,
+        query_embedding: Optional[np.ndarray] = None,
+        wait_for_audio: bool = True
     ) -> Dict:
         """
         Process text question (skip ASR).
@@ -224,6 +388,11 @@ class VocalTutorOrchestrator:
             question: Text question
             subject: Optional subject override
             generate_audio: Whether to generate TTS audio
+            on_token: Optional callback receiving LLM tokens as they are generated
+            on_audio_chunk: Optional callback receiving each synthesized sentence file
+            query_embedding: Optional precomputed embedding of the question
+            wait_for_audio: If False, return as soon as the text is ready and put
+                a Future resolving to the audio path in 'audio_future'
             
         Returns:
             Dictionary with results
@@ -238,53 +407,10 @@ class VocalTutorOrchestrator:
         }
         
         try:
-            # Detect or use subject
-            if subject is None and self.auto_detect_subject:
-                subject = self.detect_subject(question)
-            elif subject is None:
-                subject = self.current_subject or self.default_subject
-            
-            results['subject'] = subject
-            self.current_subject = subject
-            
-            # RAG retrieval
-            self.logger.info(f"Retrieving context for subject '{subject}'...")
-            try:
-                context, sources = self.rag.retrieve_with_context(
-                    question,
-                    subject,
-                    top_k=self.config.get('rag.top_k', 3)
-                )
-                results['context'] = context
-                results['sources'] = sources
-            except FileNotFoundError:
-                self.logger.warning(f"RAG index not found for {subject}")
-                context = None
-                results['context'] = None
-                results['sources'] = []
-            
-            # LLM generation
-            self.logger.info("Generating response...")
-            response = self.llm.answer_question(
-                question,
-                context=context,
-                subject=subject,
-                stream=False
+            response = self._answer(
+                question, results, subject, generate_audio, on_token, on_audio_chunk,
+                query_embedding=query_embedding, wait_for_audio=wait_for_audio
             )
-            results['response'] = response
-            
-            # Parse hints
-            hints = self.llm.parse_hints(response)
-            results['hints'] = hints
-            
-            # TTS (optional)
-            if generate_audio:
-                self.logger.info("Synthesizing speech...")
-                output_filename = f"response_{datetime.now().strftime('%Y%m%d_%H%M%S')}.wav"
-                output_path = str(Path(self.config.get('orchestrator.audio_output_dir', 'outputs/audio')) / output_filename)
-                
-                audio_path = self.tts.synthesize_to_file(response, output_path)
-                results['audio_output'] = audio_path
             
             # Success
             results['success'] = True
@@ -294,7 +420,7 @@ class VocalTutorOrchestrator:
             self.logger.info(f"✅ Processing completed in {format_time(elapsed)}")
             
             # Add to history
-            self.add_to_history(question, response, subject)
+            self.add_to_history(question, response, results['subject'])
             
         except Exception as e:
             self.logger.error(f"Error processing question: {e}", exc_info=True)
@@ -302,6 +428,376 @@ class VocalTutorOrchestrator:
         
         return results
     
+    def _answer(
+        self,
+        question: str,
+        results: Dict,
+        subject: Optional[str],
+        generate_audio: bool,
+        on_token: Optional[Callable[[str], None]],
+        on_audio_chunk: Optional[Callable[[str], None]],
+        query_embedding: Optional[np.ndarray] = None,
+        wait_for_audio: bool = True,
+        keep_audio_samples: bool = False
+    ) -> str:
+        """
+        Run the stages shared by audio and text questions: subject, RAG, LLM, TTS.
+        
+        Args:
+            question: Question text (transcript for audio input)
+            results: Results dictionary, filled in place
+            subject: Optional subject override
+            generate_audio: Whether to synthesize speech
+            on_token: Optional callback receiving LLM tokens as they are generated
+            on_audio_chunk: Optional callback receiving each synthesized sentence file
+            query_embedding: Optional precomputed embedding of the question
+            wait_for_audio: If False, put a Future resolving to the audio path
+                in 'audio_future' instead of waiting for 'audio_output'
+            keep_audio_samples: Also return the synthesized samples in
+                'audio_pcm' / 'audio_sr' (whole-answer synthesis only)
+            
+        Returns:
+            Generated response
+        """
+        subject = self.resolve_subject(question, subject)
+        
+        results['subject'] = subject
+        self.current_subject = subject
+        
+        # RAG - Retrieve relevant context
+        self.logger.info(f"Stage 2/4: Retrieving context for subject '{subject}'...")
+        try:
+            context, sources = self.rag.retrieve_with_context(
+                question,
+                subject,
+                top_k=self.config.get('rag.top_k', 3),
+                query_embedding=query_embedding,
+                max_context_tokens=self.llm.context_token_budget(question, subject),
+                count_tokens=self.llm.count_context_tokens
+            )
+            results['context'] = context
+            results['sources'] = sources
+            self.logger.info(f"Retrieved {len(sources)} sources")
+        except FileNotFoundError:
+            self.logger.warning(f"RAG index not found for {subject}, proceeding without context")
+            context = None
+            results['context'] = None
+            results['sources'] = []
+        
+        if on_token or on_audio_chunk:
+            # LLM and TTS overlapped: TTS runs on each sentence while LLM decodes
+            self.logger.info("Stage 3/4 + 4/4: Streaming response...")
+            response, audio = self._stream_response(
+                question, context, subject, generate_audio, on_token, on_audio_chunk,
+                wait_for_audio=wait_for_audio
+            )
+            results['response'] = response
+            results['hints'] = self.llm.parse_hints(response)
+            if generate_audio:
+                results['audio_output' if wait_for_audio else 'audio_future'] = audio
+            return response
+        
+        # LLM - Generate response
+        self.logger.info("Stage 3/4: Generating response...")
+        response = self.llm.answer_question(
+            question,
+            context=context,
+            subject=subject,
+            stream=False
+        )
+        results['response'] = response
+        results['hints'] = self.llm.parse_hints(response)
+        
+        # TTS - Synthesize speech
+        if generate_audio:
+            self.logger.info("Stage 4/4: Synthesizing speech...")
+            if keep_audio_samples:
+                # Samples stay in memory so playback does not re-read the file
+                audio_path, audio_pcm = self.tts_executor.submit(
+                    self.tts.synthesize_with_audio, response, self._new_audio_output_path()
+                ).result()
+                results['audio_output'] = audio_path
+                results['audio_pcm'] = audio_pcm
+                results['audio_sr'] = self.tts.sample_rate
+            elif wait_for_audio:
+                results['audio_output'] = self.synthesize_async(response).result()
+            else:
+                results['audio_future'] = self.synthesize_async(response)
+        
+        return response
+    
+    def _prefetch_downstream(self, subject: str) -> List[Future]:
+        """
+        Start loading what the stages after ASR need, in the background.
+        
+        The RAG retriever with the index of the expected subject and the LLM
+        are loaded on worker threads so that their cold start overlaps
+        transcription. Failures are only logged: the stage itself retries.
+        
+        Args:
+            subject: Subject whose index is loaded ahead
+            
+        Returns:
+            Futures to wait for before using the RAG or LLM modules
+        """
+        jobs = []
+        if self._rag is None or not self._rag.is_index_loaded(subject):
+            jobs.append(('rag', lambda: self.rag.load_index(subject)))
+        if self._llm is None:
+            jobs.append(('llm', lambda: self.llm))
+        
+        if not jobs:
+            return []
+        
+        if self._prefetch_executor is None:
+            self._prefetch_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='prefetch')
+        
+        def run(name: str, job: Callable) -> None:
+            try:
+                job()
+            except Exception as e:
+                self.logger.debug("Prefetch of %s failed: %s", name, e)
+        
+        return [self._prefetch_executor.submit(run, name, job) for name, job in jobs]
+    
+    @property
+    def tts_executor(self) -> ThreadPoolExecutor:
+        """
+        Background TTS worker shared by all requests.
+        
+        A single worker runs Piper jobs in submission order, so sentence
+        segments of one response are always synthesized in playback order.
+        """
+        if self._tts_executor is None:
+            self._tts_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='tts')
+        return self._tts_executor
+    
+    def synthesize_async(self, text: str, output_path: Optional[str] = None) -> Future:
+        """
+        Synthesize speech on the background TTS worker.
+        
+        Args:
+            text: Text to synthesize
+            output_path: Optional output WAV path (timestamped path by default)
+            
+        Returns:
+            Future resolving to the audio file path
+        """
+        tts = self.tts
+        return self.tts_executor.submit(
+            tts.synthesize_to_file, text, output_path or self._new_audio_output_path()
+        )
+    
+    def _new_audio_output_path(self) -> str:
+        """Build a unique path for a synthesized response."""
+        return str(self._audio_dir / f"response_{self._audio_session}_{next(self._audio_counter):05d}.wav")
+    
+    def _stream_response(
+        self,
+        question: str,
+        context: Optional[str],
+        subject: str,
+        generate_audio: bool,
+        on_token: Optional[Callable[[str], None]] = None,
+        on_audio_chunk: Optional[Callable[[str], None]] = None,
+        wait_for_audio: bool = True
+    ) -> Tuple[str, Union[str, Future, None]]:
+        """
+        Stream the LLM response and synthesize it sentence by sentence.
+        
+        Each completed sentence is handed to the TTS worker thread, so
+        speech synthesis overlaps with LLM decoding while segment order is kept.
+        
+        Args:
+            question: Student's question
+            context: Optional RAG context
+            subject: Subject of the question
+            generate_audio: Whether to synthesize speech
+            on_token: Optional callback receiving each generated token
+            on_audio_chunk: Optional callback receiving each segment file, in order
+            wait_for_audio: If False, return a Future for the joined audio file
+                instead of waiting for the remaining segments (segments left to
+                report are then passed to on_audio_chunk from the TTS thread)
+            
+        Returns:
+            Tuple of (full response, path to the joined audio file or None,
+            or a Future resolving to it)
+        """
+        output_path = self._new_audio_output_path()
+        segment_prefix = str(Path(output_path).with_suffix(''))
+        executor = self.tts_executor if generate_audio else None
+        futures: List[Future] = []
+        delivered = 0
+        
+        response = ""
+        segment = ""
+        segment_tokens = 0
+        
+        for token in self.llm.answer_question(question, context=context, subject=subject, stream=True):
+            response += token
+            if on_token:
+                on_token(token)
+            
+            if executor is None:
+                continue
+            
+            segment += token
+            segment_tokens += 1
+            if (self.SENTENCE_END_PATTERN.search(segment) or
+                    segment_tokens > self.MAX_TOKENS_PER_SEGMENT):
+                if segment.strip():
+                    futures.append(self.synthesize_async(
+                        segment.strip(), f"{segment_prefix}_part{len(futures)}.wav"
+                    ))
+                segment = ""
+                segment_tokens = 0
+            
+            delivered = self._deliver_audio_segments(futures, delivered, on_audio_chunk, wait=False)
+        
+        if executor is None:
+            return response, None
+        
+        # Flush the trailing sentence
+        if segment.strip():
+            futures.append(self.synthesize_async(
+                segment.strip(), f"{segment_prefix}_part{len(futures)}.wav"
+            ))
+        
+        def finish() -> Optional[str]:
+            self._deliver_audio_segments(futures, delivered, on_audio_chunk, wait=True)
+            segment_files = [f.result() for f in futures if f.result()]
+            if not segment_files:
+                return None
+            return self.tts.join_audio_files(segment_files, output_path)
+        
+        if wait_for_audio:
+            return response, finish()
+        
+        # Queued behind the segments on the single worker, so they are all done by then
+        return response, executor.submit(finish)
+    
+    @staticmethod
+    def _deliver_audio_segments(
+        futures: List[Future],
+        delivered: int,
+        on_audio_chunk: Optional[Callable[[str], None]],
+        wait: bool
+    ) -> int:
+        """
+        Report finished TTS segments in submission order.
+        
+        Args:
+            futures: TTS futures in playback order
+            delivered: Number of segments already reported
+            on_audio_chunk: Optional callback receiving each segment file
+            wait: Block until every pending segment is done
+            
+        Returns:
+            Updated number of reported segments
+        """
+        while delivered < len(futures) and (wait or futures[delivered].done()):
+            segment_path = futures[delivered].result()
+            if on_audio_chunk and segment_path:
+                on_audio_chunk(segment_path)
+            delivered += 1
+        return delivered
+    
+    def process_text_questions(
+        self,
+        questions: List[str],
+        subject: Optional[str] = None,
+        generate_audio: bool = False,
+        on_result: Optional[Callable[[int, Dict], None]] = None,
+        subjects: Optional[List[str]] = None
+    ) -> List[Dict]:
+        """
+        Process several text questions submitted together.
+        
+        All questions are embedded in a single encoder pass. With a llama.cpp
+        server the questions are then answered concurrently, so the server
+        decodes them in the same batches; the in-process model answers them
+        one after the other. Subjects are resolved beforehand, in question
+        order, as if the questions had been asked one by one.
+        
+        Args:
+            questions: Text questions
+            subject: Optional subject override for all questions
+            generate_audio: Whether to generate TTS audio
+            on_result: Optional callback receiving (question index, results)
+                as soon as each answer is ready
+            subjects: Subjects already resolved with resolve_subjects, one per
+                question (replaces subject)
+            
+        Returns:
+            List of result dictionaries, in question order
+        """
+        self.logger.info(f"Processing {len(questions)} questions")
+        
+        try:
+            embeddings = self.rag.generate_query_embeddings(questions)
+        except Exception as e:
+            self.logger.warning(f"Batch embedding failed, embedding per question: {e}")
+            embeddings = [None] * len(questions)
+        
+        # Sticky detection depends on the previous question's subject: resolve
+        # all subjects before the answers run concurrently
+        if subjects is None:
+            subjects = self.resolve_subjects(questions, subject)
+        
+        def answer(question: str, question_subject: str, embedding: Optional[np.ndarray]) -> Dict:
+            return self.process_text_question(
+                question,
+                subject=question_subject,
+                generate_audio=generate_audio,
+                query_embedding=embedding
+            )
+        
+        all_results: List[Optional[Dict]] = [None] * len(questions)
+        workers = min(self.llm.parallel_requests, len(questions)) or 1
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='question') as executor:
+            futures = {
+                executor.submit(answer, question, question_subject, embedding): i
+                for i, (question, question_subject, embedding) in enumerate(zip(questions, subjects, embeddings))
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                all_results[i] = future.result()
+                if on_result:
+                    on_result(i, all_results[i])
+        
+        # Answers finish in any order: leave the session on the last question's subject
+        if subjects:
+            self.current_subject = subjects[-1]
+        
+        return all_results
+    
+    def _open_history_db(self, db_path: Optional[str]) -> sqlite3.Connection:
+        """
+        Open the conversation history database.
+        
+        Args:
+            db_path: SQLite file to persist history across sessions,
+                or None to keep it in memory
+            
+        Returns:
+            SQLite connection (autocommit, shared by pipeline threads)
+        """
+        if db_path:
+            if os.path.dirname(db_path):
+                ensure_dir(os.path.dirname(db_path))
+        else:
+            db_path = ':memory:'
+        
+        connection = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        if db_path != ':memory:':
+            # Append-only writes never block history reads
+            connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS history ("
+            "id INTEGER PRIMARY KEY, timestamp TEXT, subject TEXT, question TEXT, response TEXT)"
+        )
+        return connection
+    
     def add_to_history(
         self,
         question: str,
@@ -311,30 +807,60 @@ class VocalTutorOrchestrator:
         """
         Add interaction to conversation history.
         
+        Only the last orchestrator.history_max_entries interactions are kept.
+        
         Args:
             question: User's question
             response: Assistant's response
             subject: Subject of conversation
         """
-        self.conversation_history.append({
-            'timestamp': datetime.now().isoformat(),
-            'subject': subject,
-            'question': question,
-            'response': response
-        })
+        with self._history_lock:
+            self._history_db.execute(
+                "INSERT INTO history (timestamp, subject, question, response) VALUES (?, ?, ?, ?)",
+                (datetime.now().isoformat(), subject, question, response)
+            )
+            if self.history_max_entries:
+                self._history_db.execute(
+                    "DELETE FROM history WHERE id <= "
+                    "(SELECT id FROM history ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (self.history_max_entries,)
+                )
+    
+    def get_conversation_history(self, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Get the most recent interactions, oldest first.
+        
+        Args:
+            limit: Maximum number of interactions
+                (defaults to orchestrator.conversation_history_length)
+            
+        Returns:
+            List of interaction dictionaries
+        """
+        if limit is None:
+            limit = self.config.get('orchestrator.conversation_history_length', 5)
+        
+        with self._history_lock:
+            rows = self._history_db.execute(
+                "SELECT timestamp, subject, question, response FROM "
+                "(SELECT * FROM history ORDER BY id DESC LIMIT ?) ORDER BY id",
+                (limit,)
+            ).fetchall()
         
-        # Keep only recent history
-        max_history = self.config.get('orchestrator.conversation_history_length', 5)
-        if len(self.conversation_history) > max_history:
-            self.conversation_history = self.conversation_history[-max_history:]
+        return [
+            {'timestamp': timestamp, 'subject': subject, 'question': question, 'response': response}
+            for timestamp, subject, question, response in rows
+        ]
     
-    def get_conversation_history(self) -> List[Dict]:
-        """Get conversation history."""
-        return self.conversation_history
+    def get_history_length(self) -> int:
+        """Get the number of stored interactions."""
+        with self._history_lock:
+            return self._history_db.execute("SELECT COUNT(*) FROM history").fetchone()[0]
     
     def clear_history(self) -> None:
         """Clear conversation history."""
-        self.conversation_history = []
+        with self._history_lock:
+            self._history_db.execute("DELETE FROM history")
         if self._llm:
             self._llm.clear_history()
         self.logger.info("Conversation history cleared")
@@ -367,7 +893,7 @@ class VocalTutorOrchestrator:
             'current_subject': self.current_subject,
             'auto_detect_subject': self.auto_detect_subject,
             'available_subjects': self.get_available_subjects(),
-            'conversation_length': len(self.conversation_history),
+            'conversation_length': self.get_history_length(),
             'modules_loaded': {
                 'asr': self._asr is not None,
                 'rag': self._rag is not None,
@@ -7,15 +7,21 @@ relevant document chunks for answering questions.
 
 import logging
 import pickle
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple, Union
 
 import faiss
 import numpy as np
+import torch
 from sentence_transformers import SentenceTransformer
 
 from .utils import Config, get_config
 
+if TYPE_CHECKING:
+    import pyarrow as pa
+
 
 class RAGRetriever:
     """RAG retrieval system for finding relevant document chunks."""
@@ -34,33 +40,83 @@ class RAGRetriever:
         # Load embedding model
         model_name = config.get('rag.embedding_model', 'sentence-transformers/all-MiniLM-L6-v2')
         self.logger.info(f"Loading embedding model: {model_name}")
-        self.embedding_model = SentenceTransformer(model_name)
+        if config.get('rag.encoder_backend', 'torch') == 'onnx':
+            from .onnx_encoder import OnnxSentenceEncoder
+            self.embedding_model = OnnxSentenceEncoder(model_name, cache_dir=config.get('rag.onnx_dir', 'models/onnx'))
+        else:
+            self.embedding_model = SentenceTransformer(model_name)
+            if config.get('rag.quantize_embeddings', False):
+                self._quantize_embedding_model()
         
         self.index_dir = Path(config.get('rag.index_dir', 'data/indices'))
         self.top_k = config.get('rag.top_k', 3)
         self.similarity_threshold = config.get('rag.similarity_threshold', 0.3)
+        self.hnsw_ef_search = config.get('rag.hnsw_ef_search', 64)
+        self.ivf_nprobe = config.get('rag.ivf_nprobe', 16)
+        # Map IVF inverted lists read-only from the index file: processes share
+        # the OS page cache (FAISS reads other index types into memory)
+        self.mmap_index = config.get('rag.mmap_index', True)
+        # Context lists chunks in index order, not score order: the same documents
+        # then always give the same prompt text, whatever the query ranked first
+        self.stable_context_order = config.get('rag.stable_context_order', True)
         
         # Cache for loaded indices
         self._indices: Dict[str, faiss.Index] = {}
-        self._chunks: Dict[str, List[Dict]] = {}
+        # Chunk metadata: a pyarrow Table (Parquet) or a list of dicts (pickle)
+        self._chunks: Dict[str, Union[List[Dict], "pa.Table"]] = {}
+        
+        # LRU of query embeddings: a repeated question skips the encoder
+        self.query_cache_size = config.get('rag.query_cache_size', 512)
+        self._query_embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._query_cache_lock = threading.Lock()
         
         # Load subject index if specified
         if subject:
             self.load_index(subject)
     
+    def _quantize_embedding_model(self) -> None:
+        """
+        Quantize the embedding model's linear layers to int8 when running on CPU.
+        
+        Query embeddings stay close enough to the fp32 document embeddings of
+        the FAISS indices, while encoding is noticeably faster on CPU.
+        """
+        if self.embedding_model.device.type != 'cpu':
+            return
+        
+        try:
+            torch.quantization.quantize_dynamic(
+                self.embedding_model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+            )
+            self.logger.info("Embedding model quantized to int8 (CPU)")
+        except Exception as e:
+            self.logger.warning(f"Could not quantize embedding model: {e}")
+    
+    def is_index_loaded(self, subject: str) -> bool:
+        """Check whether a subject's index is already in memory."""
+        return subject in self._indices
+    
     def load_index(self, subject: str) -> None:
         """
         Load FAISS index and chunks for a subject.
         
+        With rag.mmap_index, the inverted lists of IVF indices (index_type
+        ivfpq) are mapped read-only from the file and must not be modified (no
+        add/remove on the loaded index). Flat and HNSW indices are always read
+        into memory.
+        
         Args:
             subject: Subject name (maths, physique, anglais)
         """
         if subject in self._indices:
-            self.logger.debug(f"Index for {subject} already loaded")
+            self.logger.debug("Index for %s already loaded", subject)
             return
         
         index_path = self.index_dir / f"{subject}.index"
-        chunks_path = self.index_dir / f"{subject}_chunks.pkl"
+        chunks_path = self.index_dir / f"{subject}_chunks.parquet"
+        if not chunks_path.exists():
+            # Indices built before the Parquet format
+            chunks_path = self.index_dir / f"{subject}_chunks.pkl"
         
         if not index_path.exists():
             raise FileNotFoundError(
@@ -70,14 +126,33 @@ class RAGRetriever:
         
         # Load FAISS index
         self.logger.info(f"Loading FAISS index: {index_path}")
-        index = faiss.read_index(str(index_path))
-        self._indices[subject] = index
+        io_flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if self.mmap_index else 0
+        index = faiss.read_index(str(index_path), io_flags)
+        if self.mmap_index:
+            self.logger.debug(
+                "Index %s: %s", subject,
+                "inverted lists mapped" if hasattr(index, 'invlists') else "not mappable, read into memory"
+            )
+        if hasattr(index, 'hnsw'):
+            # Candidate list size of the graph search: recall vs latency
+            index.hnsw.efSearch = max(self.hnsw_ef_search, self.top_k * 8)
+        elif hasattr(index, 'nprobe'):
+            # Inverted lists scanned per query (IVF indices)
+            index.nprobe = min(self.ivf_nprobe, index.nlist)
         
         # Load chunks metadata
         self.logger.info(f"Loading chunks metadata: {chunks_path}")
-        with open(chunks_path, 'rb') as f:
-            chunks = pickle.load(f)
+        if chunks_path.suffix == '.parquet':
+            import pyarrow.parquet as pq
+            # Columns stay mapped; only the retrieved rows become Python dicts
+            chunks = pq.read_table(str(chunks_path), memory_map=True)
+        else:
+            with open(chunks_path, 'rb') as f:
+                chunks = pickle.load(f)
+        
+        # Published together, index last: search() checks _indices
         self._chunks[subject] = chunks
+        self._indices[subject] = index
         
         self.logger.info(f"Loaded index for {subject}: {index.ntotal} vectors")
     
@@ -91,19 +166,78 @@ class RAGRetriever:
         Returns:
             Query embedding vector
         """
+        key = self._query_key(query)
+        embedding = self._cached_query_embedding(key)
+        if embedding is not None:
+            return embedding
+        
         embedding = self.embedding_model.encode(
             query,
             convert_to_numpy=True,
             normalize_embeddings=True
         )
+        self._cache_query_embedding(key, embedding)
+        return embedding
+    
+    def generate_query_embeddings(self, queries: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for several queries in one encoder pass.
+        
+        Args:
+            queries: Query texts
+            
+        Returns:
+            Array of query embeddings, one row per query
+        """
+        keys = [self._query_key(query) for query in queries]
+        cached = [self._cached_query_embedding(key) for key in keys]
+        missing = [i for i, embedding in enumerate(cached) if embedding is None]
+        
+        if missing:
+            encoded = self.embedding_model.encode(
+                [queries[i] for i in missing],
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            )
+            for i, embedding in zip(missing, encoded):
+                cached[i] = embedding
+                self._cache_query_embedding(keys[i], embedding)
+        
+        return np.stack(cached)
+    
+    @staticmethod
+    def _query_key(query: str) -> str:
+        """Normalize a query for the embedding cache (case and spacing)."""
+        return " ".join(query.lower().split())
+    
+    def _cached_query_embedding(self, key: str) -> Optional[np.ndarray]:
+        """Look up a cached query embedding, marking it recently used."""
+        with self._query_cache_lock:
+            embedding = self._query_embeddings.get(key)
+            if embedding is not None:
+                self._query_embeddings.move_to_end(key)
         return embedding
     
+    def _cache_query_embedding(self, key: str, embedding: np.ndarray) -> None:
+        """Store a query embedding, evicting the least recently used one."""
+        if self.query_cache_size <= 0:
+            return
+        
+        # Shared between callers: never modified in place
+        embedding.setflags(write=False)
+        with self._query_cache_lock:
+            self._query_embeddings[key] = embedding
+            self._query_embeddings.move_to_end(key)
+            if len(self._query_embeddings) > self.query_cache_size:
+                self._query_embeddings.popitem(last=False)
+    
     def search(
         self,
         query: str,
         subject: str,
         top_k: Optional[int] = None,
-        min_score: Optional[float] = None
+        min_score: Optional[float] = None,
+        query_embedding: Optional[np.ndarray] = None
     ) -> List[Dict]:
         """
         Search for relevant chunks.
@@ -113,6 +247,7 @@ class RAGRetriever:
             subject: Subject to search in
             top_k: Optional override for number of results
             min_score: Optional minimum similarity score
+            query_embedding: Optional precomputed query embedding
             
         Returns:
             List of relevant chunks with scores
@@ -125,7 +260,8 @@ class RAGRetriever:
         chunks = self._chunks[subject]
         
         # Generate query embedding
-        query_embedding = self.generate_query_embedding(query)
+        if query_embedding is None:
+            query_embedding = self.generate_query_embedding(query)
         query_embedding = query_embedding.reshape(1, -1).astype('float32')
         
         # Search
@@ -134,18 +270,53 @@ class RAGRetriever:
         
         # Filter by threshold and prepare results
         min_score = min_score or self.similarity_threshold
-        results = []
-        
-        for score, idx in zip(scores[0], indices[0]):
-            if idx < len(chunks) and score >= min_score:
-                chunk = chunks[idx].copy()
-                chunk['score'] = float(score)
-                chunk['rank'] = len(results) + 1
-                results.append(chunk)
+        # Unfilled result slots (fewer hits than k) come back as -1
+        scores, indices = scores[0], indices[0]
+        mask = (indices >= 0) & (indices < len(chunks)) & (scores >= min_score)
+        # tolist() yields Python floats and ints in one C call
+        hit_ids = indices[mask].tolist()
+        results = self._chunk_rows(chunks, hit_ids)
+        
+        for rank, (chunk, score, idx) in enumerate(zip(results, scores[mask].tolist(), hit_ids), start=1):
+            chunk['score'] = score
+            chunk['rank'] = rank
+            chunk['chunk_index'] = idx
         
         self.logger.info(f"Found {len(results)} relevant chunks for query in {subject}")
         return results
     
+    @staticmethod
+    def _chunk_rows(chunks: Union[List[Dict], "pa.Table"], ids: List[int]) -> List[Dict]:
+        """
+        Materialize chunks as new dicts in the format built by rag_build.
+        
+        Args:
+            chunks: Chunk metadata of a subject
+            ids: Chunk positions
+            
+        Returns:
+            One chunk dict per position
+        """
+        if isinstance(chunks, list):
+            return [chunks[i].copy() for i in ids]
+        
+        if not ids:
+            return []
+        
+        return [
+            {
+                'text': row['text'],
+                'metadata': {
+                    'source': row['source'],
+                    'filename': row['filename'],
+                    'subject': row['subject']
+                },
+                'char_start': row['char_start'],
+                'char_end': row['char_end']
+            }
+            for row in chunks.take(ids).to_pylist()
+        ]
+    
     def format_context(self, results: List[Dict], max_length: Optional[int] = None) -> str:
         """
         Format search results into context string.
@@ -166,9 +337,10 @@ class RAGRetriever:
         for result in results:
             source = result['metadata'].get('filename', 'Unknown')
             text = result['text']
-            score = result['score']
             
-            part = f"[Source: {source}, Score: {score:.3f}]\n{text}\n"
+            # No per-query score here: identical documents must yield identical
+            # prompt text so the LLM can reuse their cached KV state
+            part = f"[Source: {source}]\n{text}\n"
             part_length = len(part)
             
             if max_length and total_length + part_length > max_length:
@@ -194,44 +366,71 @@ class RAGRetriever:
         Returns:
             List of source dictionaries
         """
-        sources = []
-        seen = set()
+        # Keyed by source: insertion order keeps the best-ranked result of each
+        sources: Dict[Tuple[Optional[str], Optional[str]], Dict] = {}
         
         for result in results:
             metadata = result['metadata']
             source_key = (metadata.get('filename'), metadata.get('subject'))
             
-            if source_key not in seen:
-                sources.append({
+            if source_key not in sources:
+                sources[source_key] = {
                     'filename': metadata.get('filename', 'Unknown'),
                     'subject': metadata.get('subject', 'Unknown'),
                     'score': result['score']
-                })
-                seen.add(source_key)
+                }
         
-        return sources
+        return list(sources.values())
     
     def retrieve_with_context(
         self,
         query: str,
         subject: str,
         top_k: Optional[int] = None,
-        max_context_length: Optional[int] = None
+        max_context_length: Optional[int] = None,
+        query_embedding: Optional[np.ndarray] = None,
+        max_context_tokens: Optional[int] = None,
+        count_tokens: Optional[Callable[[str], int]] = None
     ) -> Tuple[str, List[Dict]]:
         """
         Retrieve relevant chunks and format as context.
         
+        When the context exceeds max_context_tokens, whole chunks are dropped
+        from the lowest score up (the best-ranked chunk is always kept).
+        
         Args:
             query: Search query
             subject: Subject to search in
             top_k: Optional number of results
             max_context_length: Optional maximum context length
+            query_embedding: Optional precomputed query embedding
+            max_context_tokens: Optional token budget of the context
+            count_tokens: Token counter of the LLM, required with max_context_tokens
             
         Returns:
             Tuple of (formatted context, list of sources)
         """
-        results = self.search(query, subject, top_k=top_k)
-        context = self.format_context(results, max_length=max_context_length)
+        results = self.search(query, subject, top_k=top_k, query_embedding=query_embedding)
+        
+        def build_context(selected: List[Dict]) -> str:
+            # Order-independent prompt: lets the LLM KV cache reuse a retrieved
+            # set of documents even when a new question ranks them differently
+            if self.stable_context_order:
+                selected = sorted(selected, key=lambda r: r['chunk_index'])
+            return self.format_context(selected, max_length=max_context_length)
+        
+        context = build_context(results)
+        if max_context_tokens is not None and count_tokens is not None:
+            # Results are ranked: the budget is applied before reordering, so
+            # the chunks left out are the weakest ones, wherever they sit
+            kept = len(results)
+            while kept > 1 and count_tokens(context) > max_context_tokens:
+                kept -= 1
+                context = build_context(results[:kept])
+            if kept < len(results):
+                self.logger.info(f"Context over {max_context_tokens} tokens, kept {kept}/{len(results)} chunks")
+                results = results[:kept]
+        
         sources = self.get_sources(results)
         
         return context, sources
@@ -267,9 +466,10 @@ class RAGRetriever:
         chunks = self._chunks[subject]
         
         # Get unique sources
-        sources = set()
-        for chunk in chunks:
-            sources.add(chunk['metadata'].get('filename', 'Unknown'))
+        if isinstance(chunks, list):
+            sources = {chunk['metadata'].get('filename', 'Unknown') for chunk in chunks}
+        else:
+            sources = set(chunks.column('filename').to_pylist())
         
         return {
             'subject': subject,
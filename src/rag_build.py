@@ -6,16 +6,18 @@ and FAISS index creation for the RAG (Retrieval Augmented Generation) system.
 """
 
 import argparse
+import hashlib
 import logging
 import os
 import pickle
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 import faiss
 import numpy as np
 from pypdf import PdfReader
-from sentence_transformers import SentenceTransformer
 
 from .utils import Config, ensure_dir, get_config, setup_logging
 
@@ -23,16 +25,20 @@ from .utils import Config, ensure_dir, get_config, setup_logging
 class DocumentProcessor:
     """Process and chunk documents for RAG indexing."""
     
-    def __init__(self, chunk_size: int = 512, chunk_overlap: int = 50):
+    SUPPORTED_EXTENSIONS = ('.pdf', '.txt', '.md')
+    
+    def __init__(self, chunk_size: int = 512, chunk_overlap: int = 50, max_workers: Optional[int] = None):
         """
         Initialize document processor.
         
         Args:
             chunk_size: Maximum size of text chunks
             chunk_overlap: Overlap between consecutive chunks
+            max_workers: Processes loading documents in parallel (CPU count by default)
         """
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.max_workers = max_workers
         self.logger = logging.getLogger(__name__)
     
     def load_pdf(self, file_path: str) -> str:
@@ -46,16 +52,49 @@ class DocumentProcessor:
             Extracted text
         """
         try:
-            reader = PdfReader(file_path)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-            self.logger.info(f"Loaded PDF: {file_path} ({len(reader.pages)} pages)")
+            pages = self._extract_pdf_pages(file_path)
+            text = "".join(page + "\n" for page in pages)
+            self.logger.info(f"Loaded PDF: {file_path} ({len(pages)} pages)")
             return text
         except Exception as e:
             self.logger.error(f"Error loading PDF {file_path}: {e}")
             raise
     
+    def _extract_pdf_pages(self, file_path: str) -> List[str]:
+        """
+        Extract the text of each PDF page.
+        
+        PDFium (C++) is used when pypdfium2 is installed, and is much faster
+        than pypdf (pure Python), which stays as the fallback.
+        
+        Args:
+            file_path: Path to PDF file
+            
+        Returns:
+            Text of each page
+        """
+        try:
+            import pypdfium2 as pdfium
+        except ImportError:
+            pdfium = None
+        
+        if pdfium is not None:
+            try:
+                pdf = pdfium.PdfDocument(file_path)
+                try:
+                    # PDFium ends lines with CRLF, the chunker splits on "\n"
+                    return [
+                        pdf[i].get_textpage().get_text_range().replace('\r\n', '\n')
+                        for i in range(len(pdf))
+                    ]
+                finally:
+                    pdf.close()
+            except Exception as e:
+                self.logger.warning(f"PDFium could not read {file_path}, using pypdf: {e}")
+        
+        reader = PdfReader(file_path)
+        return [page.extract_text() for page in reader.pages]
+    
     def load_txt(self, file_path: str, encoding: str = 'utf-8') -> str:
         """
         Load text from TXT file.
@@ -139,6 +178,93 @@ class DocumentProcessor:
         self.logger.info(f"Created {len(chunks)} chunks from text")
         return chunks
     
+    @staticmethod
+    def simhash(text: str) -> int:
+        """
+        Compute the 64-bit SimHash of a text over its word 3-grams.
+        
+        Near-identical texts get signatures that differ in only a few bits.
+        
+        Args:
+            text: Text to hash
+            
+        Returns:
+            64-bit signature
+        """
+        words = text.lower().split()
+        shingles = [' '.join(words[i:i + 3]) for i in range(max(1, len(words) - 2))]
+        
+        hashes = np.array(
+            [int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'little') for s in shingles],
+            dtype=np.uint64
+        )
+        bits = np.unpackbits(hashes.view(np.uint8), bitorder='little').reshape(-1, 64)
+        # Majority vote per bit position
+        signature = bits.sum(axis=0) * 2 > len(shingles)
+        return int.from_bytes(np.packbits(signature, bitorder='little').tobytes(), 'little')
+    
+    def deduplicate(self, chunks: List[Dict], max_distance: int = 3) -> List[Dict]:
+        """
+        Drop chunks whose text nearly repeats an earlier chunk.
+        
+        Repeated PDF headers, footers and boilerplate would otherwise be
+        embedded several times and crowd the top results.
+        
+        Args:
+            chunks: List of chunk dictionaries
+            max_distance: Maximum Hamming distance between duplicate signatures
+            
+        Returns:
+            Chunks kept, in their original order
+        """
+        # Signatures within max_distance bits share at least one of max_distance + 1 blocks
+        n_blocks = max_distance + 1
+        block_bits = 64 // n_blocks
+        block_mask = (1 << block_bits) - 1
+        buckets: List[Dict[int, List[int]]] = [{} for _ in range(n_blocks)]
+        
+        kept = []
+        signatures = []
+        for chunk in chunks:
+            signature = self.simhash(chunk['text'])
+            blocks = [(signature >> (b * block_bits)) & block_mask for b in range(n_blocks)]
+            
+            duplicate = any(
+                (signature ^ signatures[j]).bit_count() <= max_distance
+                for b, block in enumerate(blocks)
+                for j in buckets[b].get(block, ())
+            )
+            if duplicate:
+                continue
+            
+            for b, block in enumerate(blocks):
+                buckets[b].setdefault(block, []).append(len(signatures))
+            signatures.append(signature)
+            kept.append(chunk)
+        
+        if len(kept) < len(chunks):
+            self.logger.info(f"Removed {len(chunks) - len(kept)} near-duplicate chunks")
+        return kept
+    
+    def process_file(self, file_path: str, subject: str) -> List[Dict]:
+        """
+        Load and chunk one document.
+        
+        Args:
+            file_path: Path to the document
+            subject: Subject name (maths, physique, anglais)
+            
+        Returns:
+            List of chunks with metadata
+        """
+        text = self.load_document(file_path)
+        metadata = {
+            'source': file_path,
+            'filename': Path(file_path).name,
+            'subject': subject
+        }
+        return self.chunk_text(text, metadata)
+    
     def process_directory(self, directory: str, subject: str) -> List[Dict]:
         """
         Process all documents in a directory.
@@ -157,33 +283,55 @@ class DocumentProcessor:
             self.logger.warning(f"Directory not found: {directory}")
             return all_chunks
         
-        # Find all supported files
-        files = list(directory_path.glob('*.pdf')) + \
-                list(directory_path.glob('*.txt')) + \
-                list(directory_path.glob('*.md'))
+        # Find all supported files in one directory pass (sorted: stable chunk order)
+        with os.scandir(directory_path) as entries:
+            files = sorted(
+                Path(entry.path) for entry in entries
+                if entry.is_file() and entry.name.lower().endswith(self.SUPPORTED_EXTENSIONS)
+            )
         
         self.logger.info(f"Found {len(files)} documents in {directory}")
         
-        for file_path in files:
+        def collect(file_path: Path, load: Callable[[], List[Dict]]) -> None:
             try:
-                text = self.load_document(str(file_path))
-                metadata = {
-                    'source': str(file_path),
-                    'filename': file_path.name,
-                    'subject': subject
-                }
-                chunks = self.chunk_text(text, metadata)
-                all_chunks.extend(chunks)
+                all_chunks.extend(load())
             except Exception as e:
                 self.logger.error(f"Error processing {file_path}: {e}")
         
+        if len(files) > 1 and self.max_workers != 1:
+            # PDF text extraction is CPU-bound Python: documents load in parallel processes
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [
+                    executor.submit(_process_file, str(file_path), subject, self.chunk_size, self.chunk_overlap)
+                    for file_path in files
+                ]
+                # Collected in file order, so chunk positions do not depend on scheduling
+                for file_path, future in zip(files, futures):
+                    collect(file_path, future.result)
+        else:
+            for file_path in files:
+                collect(file_path, lambda: self.process_file(str(file_path), subject))
+        
         self.logger.info(f"Total chunks created: {len(all_chunks)}")
         return all_chunks
 
 
+def _process_file(file_path: str, subject: str, chunk_size: int, chunk_overlap: int) -> List[Dict]:
+    """Load and chunk one document in a worker process."""
+    return DocumentProcessor(chunk_size, chunk_overlap).process_file(file_path, subject)
+
+
 class RAGIndexBuilder:
     """Build FAISS index for RAG retrieval."""
     
+    # With index_type 'auto', exact search below this size, HNSW graph above
+    HNSW_MIN_VECTORS = 10000
+    # Product quantizer codebooks need at least 2^nbits training vectors
+    PQ_NBITS = 8
+    PQ_MIN_VECTORS = 2 ** PQ_NBITS
+    # Chunks encoded per call while writing embeddings to disk
+    EMBEDDING_SLICE_SIZE = 4096
+    
     def __init__(self, config: Config):
         """
         Initialize RAG index builder.
@@ -194,36 +342,81 @@ class RAGIndexBuilder:
         self.config = config
         self.logger = logging.getLogger(__name__)
         
-        # Load embedding model
-        model_name = config.get('rag.embedding_model', 'sentence-transformers/all-MiniLM-L6-v2')
-        self.logger.info(f"Loading embedding model: {model_name}")
-        self.embedding_model = SentenceTransformer(model_name)
-        self.embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
+        # Embedding model is loaded on first use: failed document discovery
+        # or an empty folder never pays for it
+        self._embedding_model = None
+        
+        self.index_type = config.get('rag.index_type', 'auto')
+        self.hnsw_m = config.get('rag.hnsw_m', 32)
+        self.hnsw_ef_construction = config.get('rag.hnsw_ef_construction', 200)
+        self.pq_m = config.get('rag.pq_m', 48)
+        # Near-duplicate chunk removal (None disables it)
+        self.dedupe_max_distance = config.get('rag.dedupe_max_distance', 3)
+        self.embedding_batch_size = config.get('rag.embedding_batch_size', 128)
         
         self.processor = DocumentProcessor(
             chunk_size=config.get('rag.chunk_size', 512),
-            chunk_overlap=config.get('rag.chunk_overlap', 50)
+            chunk_overlap=config.get('rag.chunk_overlap', 50),
+            max_workers=config.get('rag.build_workers', None)
         )
     
+    @property
+    def embedding_model(self):
+        """Lazy load embedding model."""
+        if self._embedding_model is None:
+            model_name = self.config.get('rag.embedding_model', 'sentence-transformers/all-MiniLM-L6-v2')
+            self.logger.info(f"Loading embedding model: {model_name}")
+            if self.config.get('rag.encoder_backend', 'torch') == 'onnx':
+                # Same backend as the retriever, so documents and queries match
+                from .onnx_encoder import OnnxSentenceEncoder
+                self._embedding_model = OnnxSentenceEncoder(
+                    model_name, cache_dir=self.config.get('rag.onnx_dir', 'models/onnx')
+                )
+            else:
+                from sentence_transformers import SentenceTransformer
+                self._embedding_model = SentenceTransformer(model_name)
+        return self._embedding_model
+    
+    @property
+    def embedding_dim(self) -> int:
+        """Size of the embeddings (loads the embedding model)."""
+        return self.embedding_model.get_sentence_embedding_dimension()
+    
     def generate_embeddings(self, chunks: List[Dict]) -> np.ndarray:
         """
         Generate embeddings for text chunks.
         
+        Embeddings are written slice by slice to a temporary file mapped in
+        memory, so RAM holds one slice instead of the whole matrix.
+        
         Args:
             chunks: List of chunk dictionaries
             
         Returns:
-            Numpy array of embeddings
+            Numpy array of embeddings (file-backed)
         """
         texts = [chunk['text'] for chunk in chunks]
         self.logger.info(f"Generating embeddings for {len(texts)} chunks...")
         
-        embeddings = self.embedding_model.encode(
-            texts,
-            show_progress_bar=True,
-            convert_to_numpy=True,
-            normalize_embeddings=True
-        )
+        # Kept next to the indices: the system temp dir may be in RAM (tmpfs)
+        index_dir = Path(self.config.get('rag.index_dir', 'data/indices'))
+        ensure_dir(str(index_dir))
+        with tempfile.TemporaryFile(dir=index_dir) as f:
+            # The mapping stays valid once the (already unlinked) file is closed
+            embeddings = np.memmap(f, dtype=np.float32, mode='w+', shape=(len(texts), self.embedding_dim))
+        
+        for start in range(0, len(texts), self.EMBEDDING_SLICE_SIZE):
+            # encode() orders each slice by length so each batch pads little;
+            # larger batches then mostly cut the per-batch overhead
+            embeddings[start:start + self.EMBEDDING_SLICE_SIZE] = self.embedding_model.encode(
+                texts[start:start + self.EMBEDDING_SLICE_SIZE],
+                batch_size=self.embedding_batch_size,
+                show_progress_bar=len(texts) <= self.EMBEDDING_SLICE_SIZE,
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            )
+            if len(texts) > self.EMBEDDING_SLICE_SIZE:
+                self.logger.info(f"Embedded {min(start + self.EMBEDDING_SLICE_SIZE, len(texts))}/{len(texts)} chunks")
         
         self.logger.info(f"Generated embeddings: shape {embeddings.shape}")
         return embeddings
@@ -238,15 +431,63 @@ class RAGIndexBuilder:
         Returns:
             FAISS index
         """
-        self.logger.info("Building FAISS index...")
-        
-        # Use IndexFlatIP for cosine similarity (with normalized embeddings)
-        index = faiss.IndexFlatIP(self.embedding_dim)
-        index.add(embeddings.astype('float32'))
+        index_type = self.index_type
+        if index_type == 'auto':
+            index_type = 'hnsw' if len(embeddings) >= self.HNSW_MIN_VECTORS else 'flat'
+        
+        if index_type == 'ivfpq' and len(embeddings) < self.PQ_MIN_VECTORS:
+            self.logger.warning(
+                f"Too few chunks to train a product quantizer ({len(embeddings)}), using a flat index"
+            )
+            index_type = 'flat'
+        
+        self.logger.info(f"Building FAISS index ({index_type})...")
+        # No copy for float32 input (e.g. the memory-mapped embeddings)
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        dim = embeddings.shape[1]
+        
+        # Inner product = cosine similarity (with normalized embeddings)
+        if index_type == 'hnsw':
+            # Graph search visits O(log N) vectors instead of scanning all of them
+            index = faiss.IndexHNSWFlat(dim, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = self.hnsw_ef_construction
+        elif index_type == 'ivfpq':
+            # Compressed codes: pq_m bytes per vector instead of 4 * dim
+            index = self._build_ivfpq(embeddings)
+        elif index_type == 'flat':
+            index = faiss.IndexFlatIP(dim)
+        else:
+            raise ValueError(f"Unknown index type: {index_type}")
+        index.add(embeddings)
         
         self.logger.info(f"FAISS index built: {index.ntotal} vectors")
         return index
     
+    def _build_ivfpq(self, embeddings: np.ndarray) -> faiss.Index:
+        """
+        Create and train an inverted-file index with product-quantized codes.
+        
+        Args:
+            embeddings: Training embeddings (float32)
+            
+        Returns:
+            Trained, empty FAISS index
+        """
+        dim = embeddings.shape[1]
+        
+        # Number of sub-quantizers must divide the embedding size
+        pq_m = max(m for m in range(1, min(self.pq_m, dim) + 1) if dim % m == 0)
+        nlist = max(1, int(np.sqrt(len(embeddings))))
+        
+        quantizer = faiss.IndexFlatIP(dim)
+        index = faiss.IndexIVFPQ(
+            quantizer, dim, nlist, pq_m, self.PQ_NBITS, faiss.METRIC_INNER_PRODUCT
+        )
+        
+        self.logger.info(f"Training IVF-PQ index (nlist={nlist}, m={pq_m})...")
+        index.train(embeddings)
+        return index
+    
     def save_index(self, index: faiss.Index, chunks: List[Dict], subject: str) -> None:
         """
         Save FAISS index and chunk metadata.
@@ -265,11 +506,45 @@ class RAGIndexBuilder:
         self.logger.info(f"FAISS index saved: {index_path}")
         
         # Save chunks metadata
-        chunks_path = index_dir / f"{subject}_chunks.pkl"
-        with open(chunks_path, 'wb') as f:
-            pickle.dump(chunks, f)
+        try:
+            chunks_path = self._save_chunks_parquet(chunks, index_dir / f"{subject}_chunks.parquet")
+        except ImportError:
+            self.logger.warning("pyarrow not installed, saving chunks metadata with pickle")
+            chunks_path = index_dir / f"{subject}_chunks.pkl"
+            with open(chunks_path, 'wb') as f:
+                pickle.dump(chunks, f)
         self.logger.info(f"Chunks metadata saved: {chunks_path}")
     
+    @staticmethod
+    def _save_chunks_parquet(chunks: List[Dict], chunks_path: Path) -> Path:
+        """
+        Save chunks as a Parquet table (one column per field).
+        
+        Args:
+            chunks: List of chunk dictionaries
+            chunks_path: Output path
+            
+        Returns:
+            Output path
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        table = pa.table({
+            'text': [chunk['text'] for chunk in chunks],
+            'source': [chunk['metadata'].get('source') for chunk in chunks],
+            'filename': [chunk['metadata'].get('filename') for chunk in chunks],
+            'subject': [chunk['metadata'].get('subject') for chunk in chunks],
+            'char_start': pa.array([chunk['char_start'] for chunk in chunks], type=pa.int64()),
+            'char_end': pa.array([chunk['char_end'] for chunk in chunks], type=pa.int64())
+        })
+        # Repeated file and subject names are stored once per column chunk
+        pq.write_table(table, str(chunks_path), use_dictionary=['source', 'filename', 'subject'])
+        
+        # A stale pickle would not be read anymore, drop it to avoid confusion
+        chunks_path.with_suffix('.pkl').unlink(missing_ok=True)
+        return chunks_path
+    
     def build_for_subject(self, subject: str, input_dir: str = None) -> Tuple[faiss.Index, List[Dict]]:
         """
         Build complete RAG index for a subject.
@@ -293,6 +568,9 @@ class RAGIndexBuilder:
         if not chunks:
             raise ValueError(f"No documents found in {input_dir}")
         
+        if self.dedupe_max_distance is not None:
+            chunks = self.processor.deduplicate(chunks, self.dedupe_max_distance)
+        
         # Generate embeddings
         embeddings = self.generate_embeddings(chunks)
         
@@ -0,0 +1,241 @@
+"""
+Semantic Cache Module - Reuse answers to near-duplicate questions.
+
+This module caches pipeline results keyed on the question embedding and its
+subject. Random-projection LSH buckets the embeddings so that a lookup only
+compares the query against a handful of candidates instead of the whole cache.
+"""
+
+import logging
+import os
+import pickle
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from .utils import ensure_dir
+
+
+class SemanticCache:
+    """LSH-indexed cache of pipeline results for similar questions."""
+    
+    def __init__(
+        self,
+        embed_fn: Callable[[str], np.ndarray],
+        threshold: float = 0.95,
+        n_tables: int = 4,
+        n_bits: int = 8,
+        max_entries: int = 256,
+        seed: int = 42,
+        fingerprint: Optional[str] = None
+    ):
+        """
+        Initialize semantic cache.
+        
+        Args:
+            embed_fn: Function returning the embedding of a question
+            threshold: Minimum cosine similarity for a cache hit
+            n_tables: Number of LSH hash tables
+            n_bits: Number of random projections (bits) per table
+            max_entries: Maximum number of cached results (oldest evicted first)
+            seed: Seed for the random projections
+            fingerprint: Identifies what the answers depend on (models, indices,
+                settings); a saved cache with another fingerprint is not loaded
+        """
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.max_entries = max_entries
+        self.seed = seed
+        self.fingerprint = fingerprint
+        self.logger = logging.getLogger(__name__)
+        
+        # Projections are created on first use, once the embedding size is known
+        self._projections: Optional[np.ndarray] = None
+        self._bit_weights = 1 << np.arange(n_bits)
+        self._embeddings: List[np.ndarray] = []
+        self._entries: List[Dict] = []
+        self._subjects: List[Optional[str]] = []
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in range(n_tables)]
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def _hash(self, embedding: np.ndarray) -> List[int]:
+        """
+        Hash an embedding into one bucket key per table.
+        
+        Args:
+            embedding: Normalized embedding vector
+        
+        Returns:
+            List of bucket keys
+        """
+        if self._projections is None:
+            rng = np.random.default_rng(self.seed)
+            self._projections = rng.standard_normal(
+                (self.n_tables, self.n_bits, embedding.shape[0])
+            ).astype(np.float32)
+        
+        bits = (self._projections @ embedding) > 0
+        return (bits @ self._bit_weights).tolist()
+    
+    @staticmethod
+    def _normalize(embedding: np.ndarray) -> np.ndarray:
+        embedding = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm > 0 else embedding
+    
+    def lookup(self, embedding: np.ndarray, subject: Optional[str] = None) -> Optional[Dict]:
+        """
+        Find a cached result for a similar question on the same subject.
+        
+        Args:
+            embedding: Question embedding
+            subject: Subject the question is answered in
+        
+        Returns:
+            Cached result or None
+        """
+        if not self._entries:
+            return None
+        
+        embedding = self._normalize(embedding)
+        candidates = set()
+        for table, key in enumerate(self._hash(embedding)):
+            candidates.update(self._buckets[table].get(key, ()))
+        
+        # The same question asked in another subject gets another answer
+        candidates = sorted(i for i in candidates if self._subjects[i] == subject)
+        if not candidates:
+            return None
+        
+        similarities = np.stack([self._embeddings[i] for i in candidates]) @ embedding
+        best = int(np.argmax(similarities))
+        
+        if similarities[best] < self.threshold:
+            return None
+        
+        self.logger.debug("Semantic cache hit (similarity: %.3f)", similarities[best])
+        return self._entries[candidates[best]]
+    
+    def add(self, embedding: np.ndarray, result: Dict, subject: Optional[str] = None) -> None:
+        """
+        Add a result to the cache.
+        
+        Args:
+            embedding: Question embedding
+            result: Pipeline result to cache
+            subject: Subject the question was answered in
+        """
+        embedding = self._normalize(embedding)
+        
+        self._embeddings.append(embedding)
+        self._entries.append(dict(result))
+        self._subjects.append(subject)
+        
+        if len(self._entries) > self.max_entries:
+            del self._embeddings[0]
+            del self._entries[0]
+            del self._subjects[0]
+            self._rebuild_buckets()
+        else:
+            index = len(self._entries) - 1
+            for table, key in enumerate(self._hash(embedding)):
+                self._buckets[table].setdefault(key, []).append(index)
+    
+    def _rebuild_buckets(self) -> None:
+        """Rebuild LSH buckets after an eviction."""
+        self._buckets = [{} for _ in range(self.n_tables)]
+        for index, embedding in enumerate(self._embeddings):
+            for table, key in enumerate(self._hash(embedding)):
+                self._buckets[table].setdefault(key, []).append(index)
+    
+    def get_or_compute(
+        self,
+        question: str,
+        compute: Callable[[], Dict],
+        subject: Optional[str] = None
+    ) -> Dict:
+        """
+        Return a cached result for the question or compute and cache it.
+        
+        Only successful results are cached.
+        
+        Args:
+            question: Question text
+            compute: Function running the full pipeline
+            subject: Subject the question is answered in
+        
+        Returns:
+            Pipeline result, with 'cached' set to True on a cache hit
+        """
+        embedding = self.embed_fn(question)
+        
+        cached = self.lookup(embedding, subject)
+        if cached is not None:
+            result = dict(cached)
+            result['cached'] = True
+            return result
+        
+        result = compute()
+        if result.get('success'):
+            self.add(embedding, result, subject)
+        return result
+    
+    def clear(self) -> None:
+        """Remove all cached results."""
+        self._embeddings = []
+        self._entries = []
+        self._subjects = []
+        self._buckets = [{} for _ in range(self.n_tables)]
+    
+    def save(self, path: str) -> None:
+        """
+        Save cached results to disk.
+        
+        Args:
+            path: Path to the pickle file
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            ensure_dir(directory)
+        
+        with open(path, 'wb') as f:
+            pickle.dump({
+                'fingerprint': self.fingerprint,
+                'embeddings': self._embeddings,
+                'entries': self._entries,
+                'subjects': self._subjects
+            }, f)
+        self.logger.info(f"Semantic cache saved: {path} ({len(self)} entries)")
+    
+    def load(self, path: str) -> None:
+        """
+        Load cached results from disk, if the file exists.
+        
+        Results saved with another fingerprint (models, indices or settings
+        changed since) are discarded.
+        
+        Args:
+            path: Path to the pickle file
+        """
+        if not os.path.exists(path):
+            return
+        
+        try:
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+        except Exception as e:
+            self.logger.warning(f"Could not load semantic cache {path}: {e}")
+            return
+        
+        if 'subjects' not in state or state.get('fingerprint') != self.fingerprint:
+            self.logger.info(f"Semantic cache {path} is outdated (pipeline changed), ignoring it")
+            return
+        
+        self.clear()
+        for embedding, entry, subject in zip(state['embeddings'], state['entries'], state['subjects']):
+            self.add(embedding, entry, subject)
+        self.logger.info(f"Semantic cache loaded: {path} ({len(self)} entries)")
@@ -11,12 +11,12 @@ import os
 import subprocess
 import wave
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple
 
 import numpy as np
 import soundfile as sf
 
-from .utils import Config, ensure_dir, get_config, setup_logging
+from .utils import Config, ensure_dir, get_config, pcm16_to_float32, setup_logging
 
 
 class TTS:
@@ -72,6 +72,32 @@ class TTS:
                 "Make sure piper-tts is installed correctly."
             )
     
+    def _piper_command(self, speed: float) -> List[str]:
+        """
+        Build the piper command line, without the output option.
+        
+        Args:
+            speed: Speech speed
+            
+        Returns:
+            Command as a list of arguments
+        """
+        cmd = [
+            'piper',
+            '--model', self.model_path,
+            '--config', self.config_path
+        ]
+        
+        # Add speed if different from 1.0
+        if speed != 1.0:
+            cmd.extend(['--length_scale', str(1.0 / speed)])
+        
+        # Add speaker if multi-speaker model
+        if self.speaker_id > 0:
+            cmd.extend(['--speaker', str(self.speaker_id)])
+        
+        return cmd
+    
     def synthesize_to_file(
         self,
         text: str,
@@ -95,27 +121,13 @@ class TTS:
         
         speed = speed or self.speed
         self.logger.info(f"Synthesizing text to: {output_path}")
-        self.logger.debug(f"Text: '{text[:50]}...'")
+        self.logger.debug("Text: '%s...'", text[:50])
         
         try:
             # Ensure output directory exists
             ensure_dir(os.path.dirname(output_path))
             
-            # Build piper command
-            cmd = [
-                'piper',
-                '--model', self.model_path,
-                '--config', self.config_path,
-                '--output_file', output_path
-            ]
-            
-            # Add speed if different from 1.0
-            if speed != 1.0:
-                cmd.extend(['--length_scale', str(1.0 / speed)])
-            
-            # Add speaker if multi-speaker model
-            if self.speaker_id > 0:
-                cmd.extend(['--speaker', str(self.speaker_id)])
+            cmd = self._piper_command(speed) + ['--output_file', output_path]
             
             # Run piper with text as stdin
             result = subprocess.run(
@@ -152,6 +164,8 @@ class TTS:
         """
         Synthesize text to numpy array.
         
+        Piper writes raw 16-bit PCM to stdout, so no file is involved.
+        
         Args:
             text: Text to synthesize
             speed: Optional speech speed override
@@ -159,21 +173,73 @@ class TTS:
         Returns:
             Tuple of (audio array, sample rate)
         """
-        # Generate to temporary file
-        import tempfile
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp:
-            tmp_path = tmp.name
+        pcm = self._synthesize_pcm16(text, speed)
+        return pcm16_to_float32(pcm), self.sample_rate
+    
+    def synthesize_with_audio(
+        self,
+        text: str,
+        output_path: str,
+        speed: Optional[float] = None
+    ) -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """
+        Synthesize text to an audio file and keep the samples in memory.
         
-        try:
-            self.synthesize_to_file(text, tmp_path, speed)
+        The file is written from the PCM piper returned, so callers that
+        play the response right away never read it back from disk.
+        
+        Args:
+            text: Text to synthesize
+            output_path: Path to save audio file
+            speed: Optional speech speed override
             
-            # Load audio
-            audio, sr = sf.read(tmp_path)
-            return audio, sr
-        finally:
-            # Clean up temporary file
-            if os.path.exists(tmp_path):
-                os.remove(tmp_path)
+        Returns:
+            Tuple of (path to generated audio file, float32 audio array
+            at ``self.sample_rate``), or (None, None) for empty text
+        """
+        if not text or not text.strip():
+            self.logger.warning("Empty text provided for synthesis")
+            return None, None
+        
+        pcm = self._synthesize_pcm16(text, speed)
+        
+        ensure_dir(os.path.dirname(output_path))
+        with wave.open(output_path, 'wb') as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(self.sample_rate)
+            wav_file.writeframes(pcm)
+        
+        self.logger.info(f"✅ Audio synthesized successfully: {output_path}")
+        return output_path, pcm16_to_float32(pcm)
+    
+    def _synthesize_pcm16(self, text: str, speed: Optional[float] = None) -> bytes:
+        """
+        Run piper and return its raw output.
+        
+        Args:
+            text: Text to synthesize
+            speed: Optional speech speed override
+            
+        Returns:
+            Mono 16-bit little-endian PCM at ``self.sample_rate``
+        """
+        speed = speed or self.speed
+        self.logger.debug("Synthesizing raw audio: '%s...'", text[:50])
+        
+        result = subprocess.run(
+            self._piper_command(speed) + ['--output_raw'],
+            input=text.encode('utf-8'),
+            capture_output=True,
+            timeout=30
+        )
+        
+        if result.returncode != 0:
+            stderr = result.stderr.decode('utf-8', errors='replace')
+            self.logger.error(f"Piper TTS error: {stderr}")
+            raise RuntimeError(f"TTS synthesis failed: {stderr}")
+        
+        return result.stdout
     
     def synthesize_long_text(
         self,
@@ -208,17 +274,35 @@ class TTS:
             self.synthesize_to_file(sentence, temp_path)
             temp_files.append(temp_path)
         
-        # Concatenate audio files
-        self._concatenate_audio_files(temp_files, output_path)
-        
-        # Clean up temporary files
-        for temp_file in temp_files:
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
+        # Concatenate audio files and clean up temporary files
+        self.join_audio_files(temp_files, output_path)
         
         self.logger.info(f"✅ Long text synthesized: {output_path}")
         return output_path
     
+    def join_audio_files(self, input_files: list, output_path: str) -> str:
+        """
+        Join synthesized segments into one file and remove the segments.
+        
+        Args:
+            input_files: List of segment audio file paths, in playback order
+            output_path: Output file path
+            
+        Returns:
+            Path to the joined audio file
+        """
+        if len(input_files) == 1:
+            os.replace(input_files[0], output_path)
+            return output_path
+        
+        self._concatenate_audio_files(input_files, output_path)
+        
+        for input_file in input_files:
+            if os.path.exists(input_file):
+                os.remove(input_file)
+        
+        return output_path
+    
     def _split_text(self, text: str, max_length: int) -> list:
         """
         Split text into chunks at sentence boundaries.
@@ -271,7 +355,7 @@ class TTS:
             input_files: List of input audio file paths
             output_path: Output file path
         """
-        self.logger.debug(f"Concatenating {len(input_files)} audio files")
+        self.logger.debug("Concatenating %d audio files", len(input_files))
         
         # Read all audio files
         audio_arrays = []
@@ -6,10 +6,12 @@ Provides configuration management, logging setup, and helper functions.
 
 import logging
 import os
+import struct
 import sys
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
+import numpy as np
 import yaml
 
 
@@ -112,6 +114,11 @@ def setup_logging(
     """
     Setup logging configuration.
     
+    Disabled levels are rejected by the logger before any record is built,
+    so DEBUG calls in hot loops should pass %-style arguments
+    (``logger.debug("x=%s", x)``) rather than f-strings, which are always
+    formatted.
+    
     Args:
         level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         log_file: Optional file path to write logs
@@ -302,6 +309,76 @@ def save_text_file(content: str, file_path: str, encoding: str = 'utf-8') -> Non
         raise
 
 
+def pcm16_to_float32(pcm) -> np.ndarray:
+    """
+    Convert mono 16-bit PCM to float32 samples.
+    
+    Args:
+        pcm: Little-endian 16-bit samples, as bytes or an int16 array
+        
+    Returns:
+        float32 audio in [-1, 1]
+    """
+    if isinstance(pcm, (bytes, bytearray)):
+        pcm = np.frombuffer(pcm, dtype='<i2', count=len(pcm) // 2)
+    audio = pcm.astype(np.float32)
+    audio /= 32768.0
+    return audio
+
+
+def load_wav_pcm16(file_path: str) -> Optional[Tuple[np.ndarray, int]]:
+    """
+    Load a 16-bit PCM WAV file directly from its bytes.
+    
+    The RIFF header is parsed in-process and samples are read with a single
+    np.frombuffer, avoiding any decoder or temporary file.
+    
+    Args:
+        file_path: Path to WAV file
+        
+    Returns:
+        Tuple of (mono float32 audio in [-1, 1], sample rate), or None if the
+        file is not a 16-bit PCM WAV
+    """
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+    
+    if len(raw) < 12 or raw[:4] != b'RIFF' or raw[8:12] != b'WAVE':
+        return None
+    
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(raw):
+        chunk_id, chunk_size = struct.unpack_from('<4sI', raw, pos)
+        pos += 8
+        
+        if chunk_id == b'fmt ':
+            audio_format, channels, sample_rate, _, _, bits = struct.unpack_from('<HHIIHH', raw, pos)
+            fmt = (audio_format, channels, sample_rate, bits)
+        elif chunk_id == b'data':
+            # Only plain PCM (format 1) with 16-bit samples
+            if fmt is None or fmt[0] != 1 or fmt[3] != 16:
+                return None
+            _, channels, sample_rate, _ = fmt
+            
+            frame_bytes = 2 * channels
+            data_size = min(chunk_size, len(raw) - pos)
+            data_size -= data_size % frame_bytes
+            pcm = np.frombuffer(raw, dtype='<i2', count=data_size // 2, offset=pos)
+            
+            if channels > 1:
+                audio = pcm.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+                audio /= 32768.0
+            else:
+                audio = pcm16_to_float32(pcm)
+            return audio, sample_rate
+        
+        # Chunks are word-aligned
+        pos += chunk_size + (chunk_size & 1)
+    
+    return None
+
+
 # Global configuration instance
 _global_config: Optional[Config] = None
 
@@ -85,6 +85,47 @@ def test_subject_detection():
         pytest.skip("Config file not found")
 
 
+@pytest.fixture
+def keyword_orchestrator(tmp_path):
+    """Create an orchestrator with nested and overlapping subject keywords."""
+    config_path = tmp_path / 'config.yaml'
+    config_path.write_text(f"""
+orchestrator:
+  auto_detect_subject: true
+  default_subject: "maths"
+  audio_output_dir: "{tmp_path / 'audio'}"
+  subject_keywords:
+    maths:
+      - "équation"
+      - "équation du second degré"
+      - "second degré"
+    physique:
+      - "énergie"
+      - "cinétique"
+""", encoding='utf-8')
+    return VocalTutorOrchestrator(Config(str(config_path)))
+
+
+def test_subject_detection_nested_keywords(keyword_orchestrator):
+    """Test that keywords nested in a longer match are counted too."""
+    text = "Une équation du second degré pour l'énergie cinétique"
+    
+    # maths: 3 keywords (the long one and the two it contains), physique: 2
+    assert keyword_orchestrator.detect_subject(text) == 'maths'
+
+
+def test_subject_detection_sticky(keyword_orchestrator):
+    """Test that the current subject is kept when it clearly matches."""
+    text = "Une équation du second degré pour l'énergie cinétique"
+    
+    keyword_orchestrator.current_subject = 'physique'
+    assert keyword_orchestrator.detect_subject(text) == 'physique'
+    
+    # One keyword is not enough to keep it
+    keyword_orchestrator.current_subject = 'physique'
+    assert keyword_orchestrator.detect_subject("Une équation du second degré et son énergie") == 'maths'
+
+
 def test_conversation_history():
     """Test conversation history management."""
     try:
@@ -108,6 +149,49 @@ def test_conversation_history():
         pytest.skip("Config file not found")
 
 
+@pytest.fixture
+def history_orchestrator(tmp_path):
+    """Create an orchestrator with an in-memory history of at most 4 interactions."""
+    config_path = tmp_path / 'config.yaml'
+    config_path.write_text(f"""
+orchestrator:
+  audio_output_dir: "{tmp_path / 'audio'}"
+  history_db: null
+  history_max_entries: 4
+""", encoding='utf-8')
+    return VocalTutorOrchestrator(Config(str(config_path)))
+
+
+def test_history_order_and_limit(history_orchestrator):
+    """Test that the last N interactions are returned, oldest first."""
+    for i in range(3):
+        history_orchestrator.add_to_history(f"Question {i}", f"Response {i}", "maths")
+    
+    history = history_orchestrator.get_conversation_history(limit=2)
+    assert [item['question'] for item in history] == ["Question 1", "Question 2"]
+    assert [item['response'] for item in history_orchestrator.get_conversation_history(limit=10)] == [
+        "Response 0", "Response 1", "Response 2"
+    ]
+    assert history_orchestrator.get_history_length() == 3
+
+
+def test_history_trim_and_clear(history_orchestrator):
+    """Test that old interactions are deleted and that clear empties the history."""
+    for i in range(6):
+        history_orchestrator.add_to_history(f"Question {i}", f"Response {i}", "physique")
+    
+    assert history_orchestrator.get_history_length() == 4
+    history = history_orchestrator.get_conversation_history(limit=10)
+    assert [item['question'] for item in history] == [f"Question {i}" for i in range(2, 6)]
+    
+    history_orchestrator.clear_history()
+    assert history_orchestrator.get_history_length() == 0
+    assert history_orchestrator.get_conversation_history() == []
+    
+    history_orchestrator.add_to_history("Question", "Response", "anglais")
+    assert history_orchestrator.get_history_length() == 1
+
+
 def test_orchestrator_status():
     """Test orchestrator status reporting."""
     try:
@@ -0,0 +1,138 @@
+"""
+Unit tests for LLM module.
+"""
+
+import pytest
+
+pytest.importorskip('llama_cpp')
+
+from src.llm import TutorLLM
+from src.utils import Config
+
+
+class CharModel:
+    """Model stub with one token per character (0 is BOS)."""
+    
+    def tokenize(self, text: bytes, add_bos: bool = True) -> list:
+        return ([0] if add_bos else []) + [ord(c) for c in text.decode('utf-8')]
+    
+    def detokenize(self, tokens: list) -> bytes:
+        return ''.join(chr(t) for t in tokens if t).encode('utf-8')
+
+
+@pytest.fixture
+def make_llm(tmp_path):
+    """Build a TutorLLM on a character-level model stub."""
+    def make(**settings):
+        config_path = tmp_path / 'config.yaml'
+        lines = [f"  {key}: {value}" for key, value in settings.items()]
+        config_path.write_text("llm:\n  server_url: \"http://127.0.0.1:1\"\n" + "\n".join(lines) + "\n")
+        
+        # With a server URL no model is loaded: swap the client for the stub
+        llm = TutorLLM(Config(str(config_path)))
+        llm.model = CharModel()
+        return llm
+    
+    return make
+
+
+def test_build_prompt_tokens_fits(make_llm):
+    """Test that a prompt within budget is tokenized whole."""
+    llm = make_llm()
+    
+    tokens = llm.build_prompt_tokens("Qu'est-ce qu'une dérivée ?", "Une dérivée mesure...", 'maths')
+    
+    prompt = llm.build_prompt("Qu'est-ce qu'une dérivée ?", "Une dérivée mesure...", 'maths')
+    assert tokens == llm.model.tokenize(prompt.encode('utf-8'))
+
+
+def test_build_prompt_tokens_truncates_context(make_llm):
+    """Test that only the RAG context is cut when the prompt is too long."""
+    question = "Comment calculer le discriminant ?"
+    context = "".join(f"[Document {i}] Le discriminant vaut b² - 4ac. " for i in range(50))
+    base_length = len(make_llm().build_prompt_tokens(question, None, 'maths'))
+    
+    llm = make_llm(max_prompt_tokens=base_length + 300)
+    tokens = llm.build_prompt_tokens(question, context, 'maths')
+    
+    assert len(tokens) <= llm.max_prompt_tokens
+    
+    # System prompt and question are intact, the context is a prefix of the original
+    prompt = llm.model.detokenize(tokens).decode('utf-8')
+    tail = llm._prompt_tail(question)
+    head = llm.build_prompt(question, None, 'maths')[:-len(tail)] + "\n\nDocuments de référence :\n"
+    assert prompt.startswith(head)
+    assert prompt.endswith(tail)
+    kept = prompt[len(head):-len(tail)]
+    assert 0 < len(kept) < len(context)
+    assert context.startswith(kept)
+
+
+def test_context_token_budget(make_llm):
+    """Test that a context within the budget gives a prompt within max_prompt_tokens."""
+    question = "Comment calculer le discriminant ?"
+    llm = make_llm(max_prompt_tokens=2000)
+    
+    budget = llm.context_token_budget(question, 'maths')
+    context = "d" * (budget - llm.count_context_tokens("d") + 1)
+    
+    assert llm.count_context_tokens(context) == budget
+    assert len(llm.build_prompt_tokens(question, context, 'maths')) == llm.max_prompt_tokens
+
+
+@pytest.mark.parametrize('model_path, quant_variant, expected', [
+    ('models/llm/phi-3.Q4_K_M.gguf', 'Q5_K_M', 'models/llm/phi-3.Q5_K_M.gguf'),
+    ('models/llm/phi-3.IQ2_XXS.gguf', 'Q4_0', 'models/llm/phi-3.Q4_0.gguf'),
+    ('models/llm/phi-3.F16.gguf', 'Q8_0', 'models/llm/phi-3.Q8_0.gguf'),
+    ('models/llm/phi-3.gguf', 'Q4_K_M', 'models/llm/phi-3.Q4_K_M.gguf'),
+    ('models/llm/phi-3.Q4_K_M.GGUF', 'Q5_K_M', 'models/llm/phi-3.Q5_K_M.gguf'),
+    ('models/llm/phi-3.GGUF', 'Q4_K_M', 'models/llm/phi-3.Q4_K_M.gguf'),
+])
+def test_with_quant_variant(model_path, quant_variant, expected):
+    """Test that the quantization tag is replaced, or appended when missing."""
+    assert TutorLLM._with_quant_variant(model_path, quant_variant) == expected
+
+
+def test_parse_hints(make_llm):
+    """Test hint extraction from a typical three-level answer."""
+    response = (
+        "Bonne question ! Voyons cela ensemble.\n"
+        "\n"
+        "**Indice Niveau 1 (Léger)** :\n"
+        "Quelle est la forme générale d'une équation du second degré ?\n"
+        "\n"
+        "**Indice Niveau 2 (Moyen)** :\n"
+        "Pense au discriminant.\n"
+        "  \n"
+        "Il se calcule avec a, b et c.\n"
+        "\n"
+        "**Indice Niveau 3 (Fort)** :\n"
+        "Calcule Δ = b² - 4ac, puis compare-le à 0.\n"
+    )
+    
+    assert make_llm().parse_hints(response) == {
+        'niveau_1': "Quelle est la forme générale d'une équation du second degré ?",
+        'niveau_2': "Pense au discriminant.\nIl se calcule avec a, b et c.",
+        'niveau_3': "Calcule Δ = b² - 4ac, puis compare-le à 0.",
+    }
+
+
+def test_parse_hints_missing_level(make_llm):
+    """Test that a level missing from the answer stays empty."""
+    response = (
+        "Indice 1 :\n"
+        "Relis la définition de la vitesse.\n"
+        "\n"
+        "Indice 3 :\n"
+        "v = d / t\n"
+    )
+    
+    assert make_llm().parse_hints(response) == {
+        'niveau_1': "Relis la définition de la vitesse.",
+        'niveau_2': "",
+        'niveau_3': "v = d / t",
+    }
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -2,6 +2,7 @@
 Unit tests for RAG module.
 """
 
+import logging
 import os
 import tempfile
 from pathlib import Path
@@ -9,6 +10,7 @@ from pathlib import Path
 import numpy as np
 import pytest
 
+from src.rag import RAGRetriever
 from src.rag_build import DocumentProcessor, RAGIndexBuilder
 from src.utils import Config
 
@@ -65,5 +67,51 @@ def test_empty_text_handling():
     assert len(chunks) == 0
 
 
+def test_deduplicate_near_identical_chunks():
+    """Test removal of repeated chunks."""
+    processor = DocumentProcessor()
+    
+    header = "Lycée Victor Hugo - Cours de physique - Chapitre 3 - Page"
+    chunks = [
+        {'text': header},
+        {'text': "La loi d'Ohm relie la tension, l'intensité et la résistance d'un dipôle."},
+        {'text': header},
+        {'text': "L'énergie cinétique d'un solide dépend de sa masse et de sa vitesse."},
+    ]
+    
+    kept = processor.deduplicate(chunks)
+    
+    assert [chunk['text'] for chunk in kept] == [chunks[0]['text'], chunks[1]['text'], chunks[3]['text']]
+
+
+def test_context_budget_drops_lowest_scores():
+    """Test that an over-budget context drops the weakest chunks, not the last ones."""
+    # Ranked by score; the best chunk comes last in index order
+    results = [
+        {'text': "Le discriminant vaut b² - 4ac.", 'score': 0.9, 'chunk_index': 7, 'metadata': {'filename': 'c.txt'}},
+        {'text': "Une équation du second degré.", 'score': 0.6, 'chunk_index': 2, 'metadata': {'filename': 'b.txt'}},
+        {'text': "Les nombres réels.", 'score': 0.4, 'chunk_index': 0, 'metadata': {'filename': 'a.txt'}},
+    ]
+    
+    # Only the parts built by the retriever are needed (no model, no index)
+    retriever = RAGRetriever.__new__(RAGRetriever)
+    retriever.logger = logging.getLogger(__name__)
+    retriever.stable_context_order = True
+    retriever.search = lambda query, subject, top_k=None, query_embedding=None: results
+    
+    full_context, _ = retriever.retrieve_with_context("discriminant", 'maths')
+    two_chunks = retriever.format_context([results[1], results[0]])
+    assert len(two_chunks) < len(full_context)
+    
+    context, sources = retriever.retrieve_with_context(
+        "discriminant", 'maths', max_context_tokens=len(two_chunks), count_tokens=len
+    )
+    
+    assert context == two_chunks
+    assert context.index(results[1]['text']) < context.index(results[0]['text'])
+    assert results[2]['text'] not in context
+    assert [source['filename'] for source in sources] == ['c.txt', 'b.txt']
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,118 @@
+"""
+Unit tests for semantic cache module.
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import pytest
+
+from src.semantic_cache import SemanticCache
+
+
+def make_embed_fn(vectors):
+    """Build an embedding function from a question -> vector mapping."""
+    return lambda question: np.asarray(vectors[question], dtype=np.float32)
+
+
+def test_cache_hit_on_near_duplicate():
+    """Test that a near-duplicate question reuses the cached result."""
+    rng = np.random.default_rng(0)
+    base = rng.standard_normal(64)
+    vectors = {
+        'q1': base,
+        'q1 bis': base + 0.01 * rng.standard_normal(64),
+    }
+    cache = SemanticCache(make_embed_fn(vectors))
+    calls = []
+    
+    def compute():
+        calls.append(1)
+        return {'success': True, 'response': 'R1'}
+    
+    first = cache.get_or_compute('q1', compute)
+    second = cache.get_or_compute('q1 bis', compute)
+    
+    assert len(calls) == 1
+    assert 'cached' not in first
+    assert second['cached'] is True
+    assert second['response'] == 'R1'
+
+
+def test_cache_miss_on_different_question():
+    """Test that unrelated questions are not served from the cache."""
+    vectors = {'q1': np.eye(64)[0], 'q2': np.eye(64)[1]}
+    cache = SemanticCache(make_embed_fn(vectors))
+    
+    cache.get_or_compute('q1', lambda: {'success': True, 'response': 'R1'})
+    result = cache.get_or_compute('q2', lambda: {'success': True, 'response': 'R2'})
+    
+    assert result['response'] == 'R2'
+    assert len(cache) == 2
+
+
+def test_failed_results_not_cached():
+    """Test that failed pipeline results are not cached."""
+    cache = SemanticCache(make_embed_fn({'q': np.ones(8)}))
+    
+    cache.get_or_compute('q', lambda: {'success': False, 'error': 'boom'})
+    assert len(cache) == 0
+
+
+def test_eviction_and_persistence():
+    """Test max_entries eviction and save/load round trip."""
+    vectors = {f'q{i}': np.eye(16)[i] for i in range(4)}
+    cache = SemanticCache(make_embed_fn(vectors), max_entries=3)
+    
+    for i in range(4):
+        cache.get_or_compute(f'q{i}', lambda i=i: {'success': True, 'response': f'R{i}'})
+    assert len(cache) == 3
+    assert cache.lookup(vectors['q0']) is None
+    assert cache.lookup(vectors['q3'])['response'] == 'R3'
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'cache', 'semantic.pkl')
+        cache.save(path)
+        
+        restored = SemanticCache(make_embed_fn(vectors))
+        restored.load(path)
+        assert len(restored) == 3
+        assert restored.lookup(vectors['q1'])['response'] == 'R1'
+
+
+def test_cache_miss_on_other_subject():
+    """Test that a cached answer is only reused in the same subject."""
+    vectors = {'q': np.eye(16)[0]}
+    cache = SemanticCache(make_embed_fn(vectors))
+    
+    cache.get_or_compute('q', lambda: {'success': True, 'response': 'maths'}, subject='maths')
+    result = cache.get_or_compute('q', lambda: {'success': True, 'response': 'physique'}, subject='physique')
+    
+    assert 'cached' not in result
+    assert cache.lookup(vectors['q'], 'maths')['response'] == 'maths'
+    assert cache.lookup(vectors['q'], 'physique')['response'] == 'physique'
+    assert cache.lookup(vectors['q']) is None
+
+
+def test_load_ignores_other_fingerprint():
+    """Test that a cache saved for another pipeline is not loaded."""
+    vectors = {'q': np.eye(16)[0]}
+    cache = SemanticCache(make_embed_fn(vectors), fingerprint='v1')
+    cache.get_or_compute('q', lambda: {'success': True, 'response': 'R'}, subject='maths')
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'semantic.pkl')
+        cache.save(path)
+        
+        same = SemanticCache(make_embed_fn(vectors), fingerprint='v1')
+        same.load(path)
+        assert same.lookup(vectors['q'], 'maths')['response'] == 'R'
+        
+        changed = SemanticCache(make_embed_fn(vectors), fingerprint='v2')
+        changed.load(path)
+        assert len(changed) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
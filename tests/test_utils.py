@@ -14,6 +14,7 @@ from src.utils import (
     format_time,
     get_device,
     load_text_file,
+    load_wav_pcm16,
     save_text_file,
     truncate_text,
 )
@@ -101,6 +102,33 @@ def test_text_file_operations():
         assert loaded == content
 
 
+def test_load_wav_pcm16():
+    """Test in-memory PCM16 WAV decoding."""
+    import wave
+    
+    import numpy as np
+    
+    samples = np.array([[0, 16384], [-32768, 32767], [8192, 8192]], dtype='<i2')
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        wav_path = os.path.join(tmpdir, 'stereo.wav')
+        with wave.open(wav_path, 'wb') as wav:
+            wav.setnchannels(2)
+            wav.setsampwidth(2)
+            wav.setframerate(22050)
+            wav.writeframes(samples.tobytes())
+        
+        audio, sample_rate = load_wav_pcm16(wav_path)
+        assert sample_rate == 22050
+        assert audio.dtype == np.float32
+        np.testing.assert_allclose(audio, samples.mean(axis=1) / 32768.0)
+        
+        # Non-WAV input is rejected
+        txt_path = os.path.join(tmpdir, 'not_audio.txt')
+        save_text_file("not a wav file", txt_path)
+        assert load_wav_pcm16(txt_path) is None
+
+
 def test_get_device():
     """Test device detection."""
     device = get_device()
@@ -5,11 +5,11 @@ Provides an interactive web interface for the vocal tutoring system.
 """
 
 import logging
-import os
 import sys
 from pathlib import Path
 
 import gradio as gr
+import numpy as np
 
 # Add parent directory to path to import src modules
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -92,15 +92,15 @@ class VocalTutorUI:
             if audio_input is None:
                 return ("", "", "", None, "❌ Aucun audio fourni")
             
-            # Save audio to temporary file
-            import tempfile
-            import soundfile as sf
-            
+            # Convert microphone samples to mono float32 (no temporary file)
             sample_rate, audio_data = audio_input
             
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp:
-                tmp_path = tmp.name
-                sf.write(tmp_path, audio_data, sample_rate)
+            if np.issubdtype(audio_data.dtype, np.integer):
+                audio_data = audio_data.astype(np.float32) / np.iinfo(audio_data.dtype).max
+            else:
+                audio_data = audio_data.astype(np.float32, copy=False)
+            if audio_data.ndim > 1:
+                audio_data = audio_data.mean(axis=1)
             
             # Get orchestrator
             orchestrator = self._get_orchestrator()
@@ -110,15 +110,12 @@ class VocalTutorUI:
                 orchestrator.set_subject(subject)
             
             # Process
-            results = orchestrator.process_audio_file(
-                tmp_path,
+            results = orchestrator.process_audio_array(
+                audio_data,
+                sample_rate,
                 subject=None if auto_detect else subject
             )
             
-            # Clean up temp file
-            if os.path.exists(tmp_path):
-                os.remove(tmp_path)
-            
             # Extract results
             if results.get('success'):
                 transcript = results.get('transcript', '')
@@ -618,6 +615,10 @@ class VocalTutorUI:
         port = server_port or self.config.get('ui.server_port', 7860)
         share = share or self.config.get('ui.share', False)
         
+        # Load the models before serving: the first student does not wait for them
+        if self.config.get('ui.warmup_on_launch', True):
+            self._get_orchestrator().warmup()
+        
         interface = self.build_interface()
         
         self.logger.info(f"Launching UI on port {port} (share={share})")